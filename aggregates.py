@@ -0,0 +1,384 @@
+from collections import Counter
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, delete, event, func, inspect, select, text
+from sqlalchemy.orm import Session, object_session
+
+from models import (db, Student, Company, Placement, Applications, DriveStats, CompanyStats, BranchStats,
+                    APPLICATION_STATUSES)
+import fragments
+
+
+# Incrementally maintained placement statistics.
+# drive_stats / company_stats / branch_stats are updated by ORM events in the
+# same transaction as the change that caused them (apply, status update, deletes),
+# so stats pages read a handful of rows instead of scanning the application table.
+# Bulk SQL that bypasses the ORM must call the helpers below or run `flask stats-rebuild`.
+# Soft-deleted students / companies keep counting until they are purged, archived
+# drives (archive.py) leave the statistics together with their applications.
+
+STATUS_COLUMNS = {status: status.lower() for status in APPLICATION_STATUSES}
+
+
+def _add(conn, table, key_column, key, **deltas):
+    # upsert: insert the row or add the deltas to the existing one (SQLite >= 3.24 and PostgreSQL)
+    columns = ", ".join([key_column, *deltas])
+    values = ", ".join([":key", *[f":{c}" for c in deltas]])
+    updates = ", ".join(f"{c} = {table}.{c} + excluded.{c}" for c in deltas)
+
+    conn.execute(
+        text(f"INSERT INTO {table} ({columns}) VALUES ({values}) "
+             f"ON CONFLICT ({key_column}) DO UPDATE SET {updates}"),
+        {"key": key, **deltas},
+    )
+
+
+def _drive_status(conn, drive_id, status, n):
+    column = STATUS_COLUMNS.get(status)
+    if column:
+        _add(conn, "drive_stats", "drive_id", drive_id, **{column: n})
+
+
+def _company_of(conn, drive_id):
+    return conn.execute(select(Placement.company_id).where(Placement.drive_id == drive_id)).scalar()
+
+
+def _branch_of(conn, student_id):
+    return conn.execute(select(Student.branch).where(Student.student_id == student_id)).scalar()
+
+
+def _selected_count(conn, student_id):
+    return conn.execute(
+        select(func.count()).select_from(Applications)
+        .where(Applications.student_id == student_id, Applications.status == "Selected")
+    ).scalar()
+
+
+def students_added(conn, branches):                        # FOR BULK INSERTS (importer.py)
+    for branch, n in Counter(branches).items():
+        _add(conn, "branch_stats", "branch", branch, students=n)
+
+
+def application_added(conn, drive_id):                    # FOR RAW INSERTS (apply.py), status "Applied"
+    _drive_status(conn, drive_id, "Applied", 1)
+    conn.execute(
+        text("INSERT INTO company_stats (company_id, applicants) "
+             "SELECT company_id, 1 FROM placement_drives WHERE drive_id = :drive_id "
+             "ON CONFLICT (company_id) DO UPDATE SET applicants = company_stats.applicants + excluded.applicants"),
+        {"drive_id": drive_id},
+    )
+
+
+def applications_removed(conn, counts):                    # FOR BULK DELETES (jobs.py), counts: (drive_id, status) -> n
+    per_drive = Counter()
+    for (drive_id, status), n in counts.items():
+        _drive_status(conn, drive_id, status, -n)
+        per_drive[drive_id] += n
+    for drive_id, n in per_drive.items():
+        _company_applicants(conn, drive_id, -n)
+
+
+def drives_removed(conn, drives):                          # FOR BULK DELETES (archive.py), drives: (drive_id, company_id)
+    conn.execute(delete(DriveStats).where(DriveStats.drive_id.in_([drive_id for drive_id, _ in drives])))
+    for company_id, n in Counter(company_id for _, company_id in drives).items():
+        _add(conn, "company_stats", "company_id", company_id, drives=-n)
+
+
+def statuses_changed(conn, drive_id, old_statuses, new_status):       # FOR BULK STATUS UPDATES (review.py)
+    for status, n in Counter(old_statuses).items():
+        _drive_status(conn, drive_id, status, -n)
+    _drive_status(conn, drive_id, new_status, len(old_statuses))
+
+
+def placed_students(conn, student_ids):
+    # the students among student_ids that have at least one "Selected" application
+    return set(conn.execute(
+        select(Applications.student_id)
+        .where(Applications.student_id.in_(student_ids), Applications.status == "Selected")
+        .distinct()
+    ).scalars())
+
+
+def selected_counts(conn, student_ids):
+    # student_id -> number of "Selected" applications, students without any are left out
+    return dict(conn.execute(
+        select(Applications.student_id, func.count())
+        .where(Applications.student_id.in_(student_ids), Applications.status == "Selected")
+        .group_by(Applications.student_id)
+    ).all())
+
+
+def placements_changed(conn, before, after):               # placed_students() taken around a bulk update
+    changed = before ^ after
+    if not changed:
+        return
+
+    deltas = Counter()
+    for student_id, branch in conn.execute(select(Student.student_id, Student.branch)
+                                           .where(Student.student_id.in_(changed))):
+        deltas[branch] += 1 if student_id in after else -1
+    for branch, n in deltas.items():
+        if n:
+            _add(conn, "branch_stats", "branch", branch, placed=n)
+
+
+# ---- ORM events ----
+
+def _company_applicants(conn, drive_id, n):
+    company_id = _company_of(conn, drive_id)
+    if company_id is not None:
+        _add(conn, "company_stats", "company_id", company_id, applicants=n)
+
+
+# "placed" (at least one Selected application) can only be decided for the flush as a
+# whole: SQLAlchemy runs every statement of a table before the after_* events, so
+# several applications of one student see the same final count. The first time a
+# flush touches a student's Selected applications we note whether it was placed
+# (before_* events, nothing written yet), after_flush compares with the result.
+
+def _placed_before(conn, target):
+    before = object_session(target).info.setdefault("placed_before", {})
+    if target.student_id not in before:
+        before[target.student_id] = (_selected_count(conn, target.student_id) > 0,
+                                     _branch_of(conn, target.student_id))
+
+
+def _application_inserting(mapper, conn, target):
+    if target.status == "Selected":
+        _placed_before(conn, target)
+
+
+def _application_updating(mapper, conn, target):
+    history = inspect(target).attrs.status.history
+    if "Selected" in (*history.deleted, *history.added):
+        _placed_before(conn, target)
+
+
+def _application_deleting(mapper, conn, target):
+    if target.status == "Selected":
+        _placed_before(conn, target)
+
+
+def _placed_after_flush(session, flush_context):
+    before = session.info.pop("placed_before", None)
+    if not before:
+        return
+    conn = session.connection()
+    for student_id, (was_placed, branch) in before.items():
+        is_placed = _selected_count(conn, student_id) > 0
+        if branch is not None and is_placed != was_placed:
+            _add(conn, "branch_stats", "branch", branch, placed=1 if is_placed else -1)
+
+
+def _forget_placed(session):
+    session.info.pop("placed_before", None)
+
+
+def _application_inserted(mapper, conn, target):
+    _drive_status(conn, target.drive_id, target.status or "Applied", 1)
+    _company_applicants(conn, target.drive_id, 1)
+
+
+def _application_updated(mapper, conn, target):
+    history = inspect(target).attrs.status.history
+    if not history.deleted or not history.added:
+        return
+    old, new = history.deleted[0], history.added[0]
+    if old == new:
+        return
+
+    _drive_status(conn, target.drive_id, old, -1)
+    _drive_status(conn, target.drive_id, new, 1)
+
+
+def _application_deleted(mapper, conn, target):
+    _drive_status(conn, target.drive_id, target.status, -1)
+    _company_applicants(conn, target.drive_id, -1)
+
+
+def _student_inserted(mapper, conn, target):
+    _add(conn, "branch_stats", "branch", target.branch, students=1)
+
+
+def _student_updated(mapper, conn, target):
+    history = inspect(target).attrs.branch.history
+    if not history.deleted or not history.added or history.deleted[0] == history.added[0]:
+        return
+
+    placed = 1 if _selected_count(conn, target.student_id) else 0
+    _add(conn, "branch_stats", "branch", history.deleted[0], students=-1, placed=-placed)
+    _add(conn, "branch_stats", "branch", history.added[0], students=1, placed=placed)
+
+
+def _student_deleted(mapper, conn, target):
+    # its applications are deleted first (cascade), so "placed" is already taken care of
+    _add(conn, "branch_stats", "branch", target.branch, students=-1)
+
+
+def _drive_inserted(mapper, conn, target):
+    _add(conn, "drive_stats", "drive_id", target.drive_id, applied=0)
+    _add(conn, "company_stats", "company_id", target.company_id, drives=1)
+
+
+def _drive_deleted(mapper, conn, target):
+    conn.execute(delete(DriveStats).where(DriveStats.drive_id == target.drive_id))
+    _add(conn, "company_stats", "company_id", target.company_id, drives=-1)
+
+
+def _company_inserted(mapper, conn, target):
+    _add(conn, "company_stats", "company_id", target.company_id, drives=0)
+
+
+def _company_deleted(mapper, conn, target):
+    conn.execute(delete(CompanyStats).where(CompanyStats.company_id == target.company_id))
+
+
+event.listen(Applications, "before_insert", _application_inserting)
+event.listen(Applications, "before_update", _application_updating)
+event.listen(Applications, "before_delete", _application_deleting)
+event.listen(Session, "after_flush", _placed_after_flush)
+event.listen(Session, "after_rollback", _forget_placed)
+event.listen(Applications, "after_insert", _application_inserted)
+event.listen(Applications, "after_update", _application_updated)
+event.listen(Applications, "after_delete", _application_deleted)
+event.listen(Student, "after_insert", _student_inserted)
+event.listen(Student, "after_update", _student_updated)
+event.listen(Student, "after_delete", _student_deleted)
+event.listen(Placement, "after_insert", _drive_inserted)
+event.listen(Placement, "after_delete", _drive_deleted)
+event.listen(Company, "after_insert", _company_inserted)
+event.listen(Company, "after_delete", _company_deleted)
+
+
+def drive_stats_query():
+    return (
+        db.session.query(
+            Placement.drive_id,
+            Placement.job_title,
+            Company.company_name,
+            DriveStats.applied,
+            DriveStats.shortlisted,
+            DriveStats.selected,
+            DriveStats.rejected,
+        )
+        .join(Company, Placement.company_id == Company.company_id)
+        .outerjoin(DriveStats, DriveStats.drive_id == Placement.drive_id)
+    )
+
+
+# ---- full recompute, used by rebuild and check ----
+
+def compute_drive_stats():
+    counts = [
+        func.coalesce(func.sum(case((Applications.status == status, 1), else_=0)), 0).label(column)
+        for status, column in STATUS_COLUMNS.items()
+    ]
+    rows = db.session.execute(
+        select(Placement.drive_id, *counts)
+        .outerjoin(Applications, Applications.drive_id == Placement.drive_id)
+        .group_by(Placement.drive_id)
+    )
+    return {row.drive_id: dict(row._mapping) for row in rows}
+
+
+def compute_company_stats():
+    drives = (
+        select(Placement.company_id, func.count().label("drives"))
+        .group_by(Placement.company_id).subquery()
+    )
+    applicants = (
+        select(Placement.company_id, func.count(Applications.app_id).label("applicants"))
+        .join(Applications, Applications.drive_id == Placement.drive_id)
+        .group_by(Placement.company_id).subquery()
+    )
+    rows = db.session.execute(
+        select(
+            Company.company_id,
+            func.coalesce(drives.c.drives, 0).label("drives"),
+            func.coalesce(applicants.c.applicants, 0).label("applicants"),
+        )
+        .outerjoin(drives, drives.c.company_id == Company.company_id)
+        .outerjoin(applicants, applicants.c.company_id == Company.company_id)
+        .execution_options(include_deleted=True)           # soft-deleted rows count until they are purged
+    )
+    return {row.company_id: dict(row._mapping) for row in rows}
+
+
+def compute_branch_stats():
+    placed_ids = (
+        select(Applications.student_id)
+        .where(Applications.status == "Selected")
+        .distinct().subquery()
+    )
+    rows = db.session.execute(
+        select(
+            Student.branch,
+            func.count().label("students"),
+            func.count(placed_ids.c.student_id).label("placed"),
+        )
+        .outerjoin(placed_ids, placed_ids.c.student_id == Student.student_id)
+        .group_by(Student.branch)
+        .execution_options(include_deleted=True)
+    )
+    return {row.branch: dict(row._mapping) for row in rows}
+
+
+SUMMARIES = [
+    # (model, key column, recompute)
+    (DriveStats, "drive_id", compute_drive_stats),
+    (CompanyStats, "company_id", compute_company_stats),
+    (BranchStats, "branch", compute_branch_stats),
+]
+
+
+def rebuild():
+    for model, _, compute in SUMMARIES:
+        fresh = compute()
+        db.session.execute(delete(model))
+        if fresh:
+            db.session.execute(model.__table__.insert(), list(fresh.values()))
+    db.session.commit()
+    fragments.bump("applications")                         # dashboards show applicant counts from these tables
+
+
+def check():
+    # Returns a list of (table, key, stored row, expected row) that do not match
+    problems = []
+    for model, key, compute in SUMMARIES:
+        expected = compute()
+        stored = {
+            getattr(row, key): {c.key: getattr(row, c.key) for c in model.__table__.columns}
+            for row in db.session.execute(select(model)).scalars()
+        }
+        for k in expected.keys() | stored.keys():
+            if k in stored and stored[k] == expected.get(k):
+                continue
+            # a summary row that is all zeros is as good as a missing one
+            if k not in expected and not any(v for c, v in stored[k].items() if c != key):
+                continue
+            if k not in stored and not any(v for c, v in expected[k].items() if c != key):
+                continue
+            problems.append((model.__tablename__, k, stored.get(k), expected.get(k)))
+
+    return problems
+
+
+@click.command("stats-rebuild")
+@with_appcontext
+def rebuild_command():
+    """Recompute the placement statistics tables from scratch."""
+    rebuild()
+    click.echo("Placement statistics rebuilt.")
+
+
+@click.command("stats-check")
+@with_appcontext
+def check_command():
+    """Compare the placement statistics tables with a full recount."""
+    problems = check()
+    for table, key, stored, expected in problems:
+        click.echo(f"{table}[{key}]: stored={stored} expected={expected}")
+    click.echo("Statistics are consistent." if not problems else f"{len(problems)} mismatches found.")
+    if problems:
+        raise SystemExit(1)
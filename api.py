@@ -0,0 +1,356 @@
+import gzip
+import hashlib
+import json
+from datetime import date, datetime
+from functools import wraps
+
+from flask import Blueprint, Response, g, request, session
+from sqlalchemy import and_
+
+from models import db, User, Student, Company, Placement, Applications, DRIVE_OPEN
+from pagination import keyset_page, get_page_size
+from queries import DRIVE_ORDER, APPLICATION_ORDER
+from auth import load_identity
+import apply
+
+try:
+    import orjson                                          # OPTIONAL, FASTER SERIALIZATION
+except ImportError:
+    orjson = None
+
+
+# JSON API, /api/v1.
+# Every resource lists its public fields with the column behind each one, and
+# queries select only the fields asked for (?fields=id,job_title), so rows come
+# back as plain tuples and are never hydrated into ORM objects. Lists use the
+# same keyset cursors as the HTML pages (?cursor=...&per_page=...).
+#
+# Responses carry a weak ETag built from the row_version of every row (and of the
+# joined rows) they contain. A matching If-None-Match gets a 304 before anything
+# is serialized. Bodies over GZIP_MIN_BYTES are gzipped when the client accepts it.
+# Clients authenticate with the normal session cookie (POST /login).
+
+GZIP_MIN_BYTES = 1024
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@api.errorhandler(ApiError)
+def _api_error(error):
+    return Response(dumps({"error": error.message}), status=error.status, mimetype="application/json")
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), default=_default).encode()
+
+
+def roles_required(*roles):
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if load_identity() is None:
+                raise ApiError(401, "Login required.")
+            if session.get("role") not in roles:
+                raise ApiError(403, "Not allowed.")
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class Resource:
+    def __init__(self, name, fields, defaults, order, versions, base):
+        self.name = name
+        self.fields = fields                               # public name -> column
+        self.defaults = defaults                           # fields returned without ?fields=
+        self.order = order                                 # keyset ordering, last column unique
+        self.versions = versions                           # row_version columns of every table involved
+        self.base = base                                   # columns -> query with the joins
+
+    def selected(self):
+        raw = request.args.get("fields")
+        if not raw:
+            return self.defaults
+        names = [n.strip() for n in raw.split(",") if n.strip()]
+        unknown = [n for n in names if n not in self.fields]
+        if unknown:
+            raise ApiError(400, f"Unknown fields for {self.name}: {', '.join(unknown)}. "
+                                f"Available: {', '.join(self.fields)}.")
+        return names
+
+    def query(self, names):
+        columns = [self.fields[n].label(n) for n in names]
+        present = set(names)
+        for column in self.order:                          # needed for the cursors
+            if column.key not in present:
+                columns.append(column)
+                present.add(column.key)
+        columns += [v.label(f"_v{i}") for i, v in enumerate(self.versions)]
+        return self.base(columns)
+
+    def etag(self, names, rows, *extra):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((self.name, names, extra)).encode())
+        for row in rows:
+            h.update(repr([getattr(row, c.key) for c in self.order[-1:]] +
+                          [getattr(row, f"_v{i}") for i in range(len(self.versions))]).encode())
+        return h.hexdigest()
+
+
+def _respond(payload, etag, status=200):
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        body = dumps(payload)
+        response = Response(body, status=status, mimetype="application/json")
+        if len(body) >= GZIP_MIN_BYTES and request.accept_encodings["gzip"]:
+            response.set_data(gzip.compress(body, compresslevel=5))
+            response.headers["Content-Encoding"] = "gzip"
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.update(["Accept-Encoding", "Cookie"])
+    return response
+
+
+def _list(resource, query_filter):
+    # query_filter: query -> query, adds the visibility rules of the caller
+    names = resource.selected()
+    page = keyset_page(query_filter(resource.query(names)), resource.order, request.args.get("cursor"),
+                       get_page_size())
+    etag = resource.etag(names, page.items, page.next_cursor, page.prev_cursor)
+    if request.if_none_match.contains_weak(etag):
+        return _respond(None, etag)
+
+    return _respond({
+        "data": [{n: getattr(row, n) for n in names} for row in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }, etag)
+
+
+def _detail(resource, query_filter):
+    names = resource.selected()
+    row = query_filter(resource.query(names)).first()
+    if row is None:
+        raise ApiError(404, f"No such {resource.name[:-1]}.")
+    etag = resource.etag(names, [row])
+    if request.if_none_match.contains_weak(etag):
+        return _respond(None, etag)
+    return _respond({"data": {n: getattr(row, n) for n in names}}, etag)
+
+
+# ---- resources ----
+
+DRIVES = Resource(
+    "drives",
+    {
+        "id": Placement.drive_id,
+        "job_title": Placement.job_title,
+        "description": Placement.job_description,
+        "min_cgpa": Placement.min_cgpa,
+        "deadline": Placement.deadline,
+        "status": Placement.drive_status,
+        "company_id": Placement.company_id,
+        "company_name": Company.company_name,
+    },
+    ["id", "job_title", "min_cgpa", "deadline", "status", "company_id", "company_name"],
+    DRIVE_ORDER,
+    [Placement.row_version, Company.row_version],
+    lambda columns: db.session.query(*columns).join(Company, Company.company_id == Placement.company_id),
+)
+
+APPLICATIONS = Resource(
+    "applications",
+    {
+        "id": Applications.app_id,
+        "drive_id": Applications.drive_id,
+        "student_id": Applications.student_id,
+        "status": Applications.status,
+        "applied_at": Applications.app_date,
+        "job_title": Placement.job_title,
+        "company_name": Company.company_name,
+        "student_name": Student.full_name,
+        "cgpa": Student.cgpa,
+        "branch": Student.branch,
+    },
+    ["id", "drive_id", "student_id", "status", "applied_at", "job_title", "company_name"],
+    APPLICATION_ORDER,
+    [Applications.row_version, Placement.row_version, Company.row_version, Student.row_version],
+    lambda columns: (
+        db.session.query(*columns)
+        .join(Placement, Placement.drive_id == Applications.drive_id)
+        .join(Company, Company.company_id == Placement.company_id)
+        .join(Student, Student.student_id == Applications.student_id)
+    ),
+)
+
+STUDENTS = Resource(
+    "students",
+    {
+        "id": Student.student_id,
+        "full_name": Student.full_name,
+        "email": User.email,
+        "cgpa": Student.cgpa,
+        "branch": Student.branch,
+        "resume_url": Student.resume_url,
+    },
+    ["id", "full_name", "cgpa", "branch"],
+    [Student.student_id],
+    [Student.row_version],
+    lambda columns: db.session.query(*columns).join(User, User.id == Student.user_id),
+)
+
+COMPANIES = Resource(
+    "companies",
+    {
+        "id": Company.company_id,
+        "company_name": Company.company_name,
+        "website": Company.website,
+        "hr_contact": Company.hr_contact,
+        "approval_status": Company.approval_status,
+        "is_blacklisted": Company.is_blacklisted,
+    },
+    ["id", "company_name", "website"],
+    [Company.company_id],
+    [Company.row_version],
+    lambda columns: db.session.query(*columns),
+)
+
+
+def _open_drives(query):
+    return query.filter(Company.is_blacklisted == False, Placement.drive_status == DRIVE_OPEN,
+                        Placement.deadline > datetime.now())
+
+
+def _visible_drives(query):
+    # admins see every drive, companies their own and the open ones, students the open ones
+    if session.get("role") == "Admin":
+        return query
+    if session.get("role") == "Company":
+        mine = Placement.company_id == g.company.company_id
+        return query.filter(mine | and_(Company.is_blacklisted == False, Placement.drive_status == DRIVE_OPEN,
+                                        Placement.deadline > datetime.now()))
+    return _open_drives(query)
+
+
+def _visible_companies(query):
+    if session.get("role") == "Admin":
+        return query
+    return query.filter(Company.approval_status == "Approved", Company.is_blacklisted == False)
+
+
+# ---- routes ----
+
+@api.route("/drives")
+@roles_required("Student", "Company", "Admin")
+def list_drives():
+    scope = request.args.get("scope", "open")              # open / mine (company) / all (admin)
+    if scope == "mine" and session.get("role") == "Company":
+        return _list(DRIVES, lambda q: q.filter(Placement.company_id == g.company.company_id))
+    if scope == "all" and session.get("role") == "Admin":
+        return _list(DRIVES, lambda q: q)
+    if scope != "open":
+        raise ApiError(400, f"Scope {scope!r} is not available.")
+    return _list(DRIVES, _open_drives)
+
+
+@api.route("/drives/<int:drive_id>")
+@roles_required("Student", "Company", "Admin")
+def get_drive(drive_id):
+    return _detail(DRIVES, lambda q: _visible_drives(q).filter(Placement.drive_id == drive_id))
+
+
+@api.route("/applications")
+@roles_required("Student", "Company", "Admin")
+def list_applications():
+    role = session.get("role")
+    drive_id = request.args.get("drive_id", type=int)
+    student_id = request.args.get("student_id", type=int)
+
+    if role == "Student":
+        return _list(APPLICATIONS, lambda q: q.filter(Applications.student_id == g.student.student_id))
+
+    if role == "Company":
+        if drive_id is None:
+            raise ApiError(400, "drive_id is required.")
+        return _list(APPLICATIONS, lambda q: q.filter(Applications.drive_id == drive_id,
+                                                      Placement.company_id == g.company.company_id))
+
+    def admin_filter(query):
+        if drive_id is not None:
+            query = query.filter(Applications.drive_id == drive_id)
+        if student_id is not None:
+            query = query.filter(Applications.student_id == student_id)
+        return query
+    return _list(APPLICATIONS, admin_filter)
+
+
+APPLY_RESPONSES = {
+    apply.APPLIED: (201, "Application submitted."),
+    apply.REPLAYED: (200, "Application submitted."),      # same Idempotency-Key as an earlier success
+    apply.DUPLICATE: (409, "Already applied to this drive."),
+    apply.NOT_ELIGIBLE: (403, "Not eligible for this drive."),
+    apply.CLOSED: (409, "Applications for this drive are closed."),
+    apply.MISSING: (404, "No such drive."),
+}
+
+
+@api.route("/applications", methods=["POST"])
+@roles_required("Student")
+def create_application():
+    body = request.get_json(silent=True) or request.form
+    try:
+        drive_id = int(body.get("drive_id"))
+    except (TypeError, ValueError):
+        raise ApiError(400, "drive_id is required.")
+
+    key = request.headers.get("Idempotency-Key")
+    if key is not None and len(key) > apply.MAX_KEY_LENGTH:
+        raise ApiError(400, f"Idempotency-Key can be at most {apply.MAX_KEY_LENGTH} characters.")
+
+    outcome = apply.submit_application(g.student.student_id, drive_id, key)
+    status, message = APPLY_RESPONSES[outcome]
+    if status >= 400:
+        raise ApiError(status, message)
+    return _respond({"result": outcome, "message": message}, None, status)
+
+
+@api.route("/students")
+@roles_required("Admin")
+def list_students():
+    return _list(STUDENTS, lambda q: q)
+
+
+@api.route("/students/<int:student_id>")
+@roles_required("Student", "Admin")
+def get_student(student_id):
+    if session.get("role") == "Student" and g.student.student_id != student_id:
+        raise ApiError(403, "Not allowed.")
+    return _detail(STUDENTS, lambda q: q.filter(Student.student_id == student_id))
+
+
+@api.route("/companies")
+@roles_required("Student", "Company", "Admin")
+def list_companies():
+    return _list(COMPANIES, _visible_companies)
+
+
+@api.route("/companies/<int:company_id>")
+@roles_required("Student", "Company", "Admin")
+def get_company(company_id):
+    return _detail(COMPANIES, lambda q: _visible_companies(q).filter(Company.company_id == company_id))
@@ -1,18 +1,119 @@
-from flask import Flask, request, redirect, render_template, flash, url_for, session
-from models import db, User, Company, Student, Placement, Applications, Admin
-from werkzeug.security import generate_password_hash, check_password_hash
+import os
+import threading
+
+import click
+from flask import Flask, Blueprint, current_app, request, redirect, render_template, flash, url_for, session, g, abort
+from flask.cli import with_appcontext
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db, User, Company, Student, Placement, Applications, Admin, APPLICATION_STATUSES
+from models import CompanyStats, BranchStats
 from datetime import datetime, timezone
-from sqlalchemy import or_
-
-app = Flask(__name__)
-
-
-
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///placement.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.secret_key = 'super_secret_key_for_session'
-#LINK THE DATA BASE
-db.init_app(app)
+import math
+from queries import (student_dashboard_data, open_drives_page, company_drives_query, all_drives_query,
+                     drive_applications_query, DRIVE_ORDER, APPLICATION_ORDER)
+from pagination import keyset_page, get_page_size, page_url
+from migrations import upgrade_db
+from search import search_students, search_companies, search_drives
+from eligibility import drive_index, student_index, eligible_student_count
+from importer import import_students_command, import_companies_command
+from exporter import placement_report, export_response
+from aggregates import rebuild_command, check_command, drive_stats_query
+from config import Config, engine_options
+from auth import role_required, load_identity
+from passwords import hash_password, verify_password, needs_rehash, HashingBusy
+from ratelimit import LoginThrottle
+from review import parse_status, update_statuses
+from fragments import cached_fragment, digest, hit_ratios
+from deadlines import start_scheduler, close_expired_command
+from archive import archive_command, purge_command, season_report
+import apply
+import jobs
+import ranking
+import resumes
+from api import api
+import instrumentation
+
+# The app is built by create_app(), nothing touches the database at import time.
+#
+#   flask --app app init-db                                # once per deploy: migrations and admin account
+#   flask --app app run                                    # development server
+#   gunicorn -c gunicorn.conf.py wsgi:app                  # production, see wsgi.py
+#
+# Every page lives on the `main` blueprint (url_for('main.login')), the JSON API
+# on `api`. Background threads (deadline scheduler, job worker) start with the
+# first request of each serving process, so CLI commands never run them and
+# workers forked from a preloaded app get their own.
+
+bp = Blueprint("main", __name__)
+
+
+def create_app(config=None):
+    # config: optional dict of settings applied over config.Config (tests, benchmarks)
+    app = Flask(__name__)
+    app.config.from_object(Config)                        # DATABASE_URL, pool size etc. come from the environment (config.py)
+    if config:
+        app.config.from_mapping(config)
+    # pool settings for the URL actually used, which a config override may have changed
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])   # real client address for the login throttle
+
+    #LINK THE DATA BASE
+    db.init_app(app)
+    instrumentation.init_app(app)                         # latency / SQL metrics, see /admin/metrics
+    resumes.init_app(app)                                 # resume store and streamed uploads
+    app.register_blueprint(bp)
+    app.register_blueprint(api)                           # JSON API under /api/v1
+    app.before_request(_start_background)
+    app.jinja_env.globals['page_url'] = page_url
+    app.jinja_env.globals['idempotency_key'] = apply.new_idempotency_key
+    app.extensions['login_throttle'] = LoginThrottle(
+        app.config['LOGIN_IP_BURST'], app.config['LOGIN_IP_PER_MINUTE'],
+        app.config['LOGIN_ACCOUNT_BURST'], app.config['LOGIN_ACCOUNT_PER_MINUTE'])
+
+    app.cli.add_command(init_db_command)                  # flask --app app init-db
+    app.cli.add_command(import_students_command)          # flask --app app import-students file.csv
+    app.cli.add_command(import_companies_command)
+    app.cli.add_command(rebuild_command)                  # flask --app app stats-rebuild
+    app.cli.add_command(check_command)                    # flask --app app stats-check
+    app.cli.add_command(close_expired_command)            # flask --app app close-expired-drives (cron)
+    app.cli.add_command(jobs.worker_command)              # flask --app app jobs-worker
+    app.cli.add_command(archive_command)                  # flask --app app archive-drives (end of season)
+    app.cli.add_command(purge_command)                    # flask --app app purge-deleted
+    app.cli.add_command(resumes.gc_command)               # flask --app app resumes-gc (after purge-deleted)
+
+    return app
+
+
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def _start_background():
+    # Once per process, a forked worker does not inherit the threads of its parent
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        app = current_app._get_current_object()
+        if app.config['DEADLINE_SCHEDULER']:
+            start_scheduler(app)                          # closes drives as their deadline passes
+        if app.config['JOB_WORKER_THREAD']:
+            jobs.start_worker(app)                        # deletes and notifications off the request path
+
+
+APPLY_MESSAGES = {
+    apply.APPLIED: ("Application Sumited Successfully.", "success"),
+    apply.REPLAYED: ("Application Sumited Successfully.", "success"),   # same form sent twice
+    apply.DUPLICATE: ("You already applied for this job.", "info"),
+    apply.NOT_ELIGIBLE: ("Your are not elegible", "error"),
+    apply.CLOSED: ("Applications for this job are closed.", "info"),
+    apply.MISSING: ("This job no longer available.", "info"),
+}
 
 def create_admin():                                         # ADMIN CREATE AUTOMATICTALLY
     email = "admin@gmail.com"
@@ -25,7 +126,7 @@ def create_admin():                                         # ADMIN CREATE AUTOM
     if not existing_user:
         try:
             # 2. Create the central User entry
-            hashed_password = generate_password_hash(password)
+            hashed_password = hash_password(password)
             new_user = User(
                 email=email, 
                 password=hashed_password, 
@@ -43,39 +144,66 @@ def create_admin():                                         # ADMIN CREATE AUTOM
             )
             db.session.add(new_admin_profile)
             db.session.commit()
-            print("Admin account and profile created successfully.")
+            current_app.logger.info("Admin account and profile created successfully.")
         except Exception as e:
             db.session.rollback()
-            print(f"Error creating admin: {e}")
+            current_app.logger.error(f"Error creating admin: {e}")
     else:
-        print("Admin user already exists.")
+        current_app.logger.info("Admin user already exists.")
 
 
-#create all data tables if they not exists
-with app.app_context():
-    db.create_all()
+def init_db():                                              # CALL INSIDE app.app_context()
+    # create missing tables, upgrade old placement.db files in place, seed the admin
+    version = upgrade_db()
     create_admin()
-    
-    print("done")
+    return version
 
-@app.route('/', methods=["GET", "POST"])                   # DEFAULT ROUTE
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create or upgrade the database and the admin account (run once per deploy)."""
+    click.echo(f"Database at schema version {init_db()}.")
+
+
+@bp.route('/', methods=["GET", "POST"])                   # DEFAULT ROUTE
 def index():
     return render_template("index.html")
 
-@app.route('/login', methods=["GET", "POST"])               # LOGIN ROUTE
+@bp.route('/login', methods=["GET", "POST"])               # LOGIN ROUTE
 def login():
     if request.method == "POST":
         email = request.form.get('email')
-        password = request.form.get('password')
+        password = request.form.get('password') or ""
+
+        if current_app.config['LOGIN_RATE_LIMIT']:                  # THROTTLE PER IP AND PER ACCOUNT BEFORE ANY HASHING
+            wait = current_app.extensions['login_throttle'].attempt(request.remote_addr, email)
+            if wait:
+                flash(f"Too many login attempts. Please try again in {math.ceil(wait)} seconds.", "error")
+                return render_template("login.html"), 429
         
         user = User.query.filter_by(email=email).first()
         
-        # Checking credentials
-        if user and check_password_hash(user.password, password):
+        # Checking credentials (hashing runs in the password worker pool)
+        try:
+            valid = user is not None and verify_password(user.password, password)
+        except HashingBusy:
+            flash("Server is busy, please try again in a moment.", "error")
+            return render_template("login.html"), 503
+
+        if valid:
+            if needs_rehash(user.password):                 # HASH SETTINGS CHANGED, UPGRADE THIS USER NOW
+                user.password = hash_password(password)
+                db.session.commit()
 
             if hasattr(user, 'is_blacklisted') and user.is_blacklisted:
                 flash("Access Denied: Your Account is Blacklisted Contact Support.", "error")
-                return redirect(url_for('login'))
+                return redirect(url_for('main.login'))
+
+            role = user.role.strip().capitalize() if user.role else ""
+            if (role == "Student" and user.student_profile is None) or (role == "Company" and user.company_profile is None):
+                flash("This account has been deleted. Contact the placement cell.", "error")   # SOFT DELETED PROFILE
+                return redirect(url_for('main.login'))
             
             # STANDARD SESSION KEYS (Use these names everywhere)
             session['user_id'] = user.id 
@@ -85,57 +213,52 @@ def login():
 
             # Role-based redirection using the cleaned session role
             if session['role'] == "Company":
-                return redirect(url_for('company_dashboard'))
+                return redirect(url_for('main.company_dashboard'))
             elif session['role'] == "Student":
-                return redirect(url_for('student_dashboard'))
+                return redirect(url_for('main.student_dashboard'))
             elif session['role'] == "Admin":
-                return redirect(url_for('admin_dashboard'))
+                return redirect(url_for('main.admin_dashboard'))
             else:
                 flash(f"Login success, but role '{user.role}' is not recognized.", "info")
-                return redirect(url_for('login'))
+                return redirect(url_for('main.login'))
         else:  
             flash("Invalid email or password please try again", "error")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
     
     return render_template("login.html")
 
-@app.route('/dashboard/student', methods=["GET", "POST"])              # STUDENT DASHBOARD
+@bp.route('/dashboard/student', methods=["GET", "POST"])              # STUDENT DASHBOARD
+@role_required("Student", "Please login as a Student to access the student dashboard", "info")
 def student_dashboard():
-    # SECURE CHECK: Must match the keys set in login()
-    user_id = session.get('user_id')
-    role = session.get('role')
-
-    if not user_id or role != "Student":
-        flash("Please login as a Student to access the student dashboard", "info")
-        return redirect(url_for('login'))
-    
-    user = User.query.get(user_id)
-    student = user.student_profile
+    student = g.student
     
-    if not student:
-        flash("Student profile not found. Please contact support.", "error")
-        return redirect(url_for('index'))
+    # Drives, company names and applications come back as flat rows (no lazy loads in the template)
+    my_applications, applied_drive_ids, eligible_drive_ids = student_dashboard_data(student)
+
+    # The drive table only depends on the drive page and on what this student applied to / is eligible for
+    cursor, per_page = request.args.get('drives'), get_page_size()
+    drive_table = cached_fragment(
+        "student_drives", ["drives"],
+        lambda: render_template("_student_drives.html", drives=open_drives_page(cursor, per_page),
+                                applied_ids=applied_drive_ids, eligible_ids=eligible_drive_ids),
+        digest(applied_drive_ids), digest(eligible_drive_ids))
     
-    available_drives = Placement.query.join(Company).filter(Company.is_blacklisted == False).all()
-    applied_drive_ids = [app.drive_id for app in student.applications]
-    
-    # PASS 'applied_ids' TO MATCH YOUR HTML TEMPLATE
     return render_template("student_dashboard.html", 
                            student=student, 
-                           drives=available_drives, 
-                           applied_ids=applied_drive_ids)
+                           drive_table=drive_table,
+                           applications=my_applications)
 
 
-@app.route('/logout', methods=["GET", "POST"])
+@bp.route('/logout', methods=["GET", "POST"])
 def logout():
     session.clear()
     flash("You have been logout successfully", "success")
 
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
             
 
-@app.route('/register/student', methods=["GET", "POST"])              # Student route
+@bp.route('/register/student', methods=["GET", "POST"])              # Student route
 def register_student():
     if request.method == 'POST':
         email = request.form.get('email')
@@ -148,10 +271,10 @@ def register_student():
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
             flash("Email is already registered", "info")
-            return redirect(url_for('register_student'))
+            return redirect(url_for('main.register_student'))
         
         try:
-            hashed_password = generate_password_hash(password)
+            hashed_password = hash_password(password)
             new_user = User(email=email, password=hashed_password, role='Student')
             db.session.add(new_user)
             db.session.flush()
@@ -171,7 +294,7 @@ def register_student():
             db.session.commit()
 
             flash("Registration successful", "success")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         except Exception as e:
             db.session.rollback()
             return f"An error occured {str(e)}"
@@ -180,7 +303,7 @@ def register_student():
 
 
 
-@app.route('/register/company', methods=["GET", "POST"])         #Company route
+@bp.route('/register/company', methods=["GET", "POST"])         #Company route
 def register_company():
     if request.method=="POST":
         email = request.form.get('company_email')
@@ -193,10 +316,10 @@ def register_company():
 
         if existing_user:
             flash("Company already registered", "info")
-            return redirect(url_for('register_company'))
+            return redirect(url_for('main.register_company'))
         
         try:
-            hashed_password = generate_password_hash(password)
+            hashed_password = hash_password(password)
             new_user = User(email=email, password=hashed_password, role='Company')
             db.session.add(new_user)
             db.session.flush()
@@ -213,7 +336,7 @@ def register_company():
             db.session.commit()
 
             flash("Registration is Successful", "success")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         
         except Exception as e:
             db.session.rollback()
@@ -222,37 +345,29 @@ def register_company():
     return render_template("register_company.html")
 
 
-@app.route('/dashboard/company', methods=["GET", "POST"])
+@bp.route('/dashboard/company', methods=["GET", "POST"])
+@role_required("Company", "Please login as a company to access to company dashboard", "info")
 def company_dashboard():
-    user_id = session.get('user_id')
-    role = session.get('role')
+    company = g.company
+    cursor, per_page = request.args.get('drives'), get_page_size()
 
-    # 1. Protection Check
-    if not user_id or role != 'Company':
-        flash("Please login as a company to access to company dashboard", "info")
-        return redirect(url_for('login'))
-    
-    # 2. Database Fetch
-    user = User.query.get(user_id)
-    if not user or not user.company_profile:
-        flash("Company profile not found.", "error")
-        return redirect(url_for('index'))
-    
-    company = user.company_profile
-    my_drives = Placement.query.filter_by(company_id=company.company_id).all()
+    def render_drives():
+        my_drives = keyset_page(company_drives_query(company.company_id), DRIVE_ORDER, cursor, per_page)
+        eligible_counts = student_index().eligible_counts(drive_index())
+        return render_template('_company_drives.html', drives=my_drives, eligible_counts=eligible_counts)
+
+    # applicant and eligible counts make the list depend on applications and students too
+    drive_list = cached_fragment("company_drives", ["drives", "applications", "students"], render_drives,
+                                 company.company_id)
 
-    return render_template('company_dashboard.html', company=company, drives=my_drives)
+    return render_template('company_dashboard.html', company=company, drive_list=drive_list)
 
 
-@app.route('/post-drive', methods=["GET", "POST"])                          #POST JOB
+@bp.route('/post-drive', methods=["GET", "POST"])                          #POST JOB
+@role_required("Company", "Unauthorized access.")
 def post_drive():
-    if 'user_id' not in session or session.get('role') != "Company":
-        flash("Unauthorized access.", "error")
-        return redirect(url_for('login'))
-    
     if request.method == "POST":
-        user = User.query.get(session['user_id'])
-        company_id = user.company_profile.company_id
+        company_id = g.company.company_id
 
         job_title = request.form.get('job_title')
         min_cgpa = request.form.get('min_cgpa')
@@ -274,84 +389,108 @@ def post_drive():
             db.session.commit()
 
             flash("Job drive post successfully", "success")
-            return redirect(url_for('company_dashboard'))
+            return redirect(url_for('main.company_dashboard'))
         
         except Exception as e:
             db.session.rollback()
             flash(f"Error in posting drive: {str(e)}", "error")
-            return redirect(url_for('post_drive'))
+            return redirect(url_for('main.post_drive'))
         
     return render_template('post_drive.html')
 
 
 
 
-@app.route('/apply/<int:drive_id>', methods=["GET", "POST"])                 # APPLY FOR JOB
+@bp.route('/apply/<int:drive_id>', methods=["GET", "POST"])                 # APPLY FOR JOB
+@role_required("Student", "Please login as a student to apply.", "info")
 def apply_for_job(drive_id):
-    if 'user_id' not in session or session.get('role') != 'Student':
-        flash("Please login as a student to apply.", "info")
-        return redirect(url_for('login'))
-    
-    user = User.query.get(session['user_id'])
-    student = user.student_profile
+    # eligibility check and insert are ONE statement, the unique index handles double submits
+    key = request.form.get('idempotency_key')
+    if key is not None and len(key) > apply.MAX_KEY_LENGTH:
+        key = None                                        # not one of ours, apply without replay protection
+    outcome = apply.submit_application(g.student.student_id, drive_id, key)
+    flash(*APPLY_MESSAGES[outcome])
 
-    existing_app = Applications.query.filter_by(
-        student_id = student.student_id,
-        drive_id=drive_id
-    ).first()
+    return redirect(url_for('main.student_dashboard',))
 
 
+@bp.route('/view-applications/<int:drive_id>')                        #VIEW APPLICTAIONS FOR COMPANY
+@role_required("Company", "Unauthorised Access.")
+def view_applications(drive_id):
+    drive = Placement.query.get_or_404(drive_id)
+
+    if drive.company_id != g.company.company_id:
+        flash("You do not have permisson to view these Applications", "error")
+        return redirect(url_for('main.company_dashboard'))
     
-    drive = Placement.query.get(drive_id)              #IF JOB IS DELETE
-    if not drive:
-        flash("This job no longer available.", "info")
-        return redirect(url_for('student_dashboard'))
-    
-    if student.cgpa < drive.min_cgpa :                  # STUDENT WIL NOT BYPASS
-        flash("Your are not elegible", "error")
-        return redirect(url_for('student_dashboard'))
+    if request.args.get('rank'):                          # BEST CANDIDATES FIRST (ranking.py)
+        top = request.args.get('top', current_app.config['RANK_TOP_K'], type=int)
+        top = max(1, min(top, current_app.config['RANK_MAX_TOP']))
+        preferred = request.args.getlist('branch')
+        ranked = ranking.ranked_applications(drive, top, preferred)
+        return render_template("view_applications.html", drive=drive, applications=ranked.rows,
+                               ranked=ranked, top=top, preferred=preferred,
+                               eligible_count=eligible_student_count(drive_id), statuses=APPLICATION_STATUSES)
 
-    if existing_app:
-        flash("You already applied for this job.", "info")
+    applications = keyset_page(drive_applications_query(drive_id), APPLICATION_ORDER,
+                               request.args.get('apps'), get_page_size())
 
-    else:
-        new_app = Applications(
-            student_id=student.student_id,
-            drive_id=drive_id,
-            status="Applied"
-        )
+    return render_template("view_applications.html", drive=drive, applications=applications,
+                           eligible_count=eligible_student_count(drive_id), statuses=APPLICATION_STATUSES)
 
-        db.session.add(new_app)
-        db.session.commit()
-        flash("Application Sumited Successfully.", "success")
 
-    
+@bp.route('/export/drive/<int:drive_id>.<any(csv, ndjson):fmt>')       #EXPORT APPLICANTS OF ONE DRIVE
+@role_required("Company", "Unauthorised Access.")
+def export_drive(drive_id, fmt):
+    drive = Placement.query.get_or_404(drive_id)
 
-    return redirect(url_for('student_dashboard',))
+    if drive.company_id != g.company.company_id:
+        flash("You do not have permisson to export these Applications", "error")
+        return redirect(url_for('main.company_dashboard'))
 
+    return export_response(placement_report(drive_id=drive_id), fmt, f"drive_{drive_id}_applications")
 
-@app.route('/view-applications/<int:drive_id>')                        #VIEW APPLICTAIONS FOR COMPANY
-def view_applications(drive_id):
-    if 'user_id' not in session or session.get('role') != 'Company':
-        flash("Unauthorised Access.", "error")
-        return redirect(url_for('login'))
+
+@bp.route('/export/company.<any(csv, ndjson):fmt>')                    #EXPORT APPLICANTS OF ALL MY DRIVES
+@role_required("Company", "Unauthorised Access.")
+def export_company(fmt):
+    company = g.company
+
+    return export_response(placement_report(company_id=company.company_id), fmt,
+                           f"company_{company.company_id}_applications")
+
+
+@bp.route('/view-applications/<int:drive_id>/resumes.zip')            #ALL RESUMES OF ONE DRIVE
+@role_required("Company", "Unauthorised Access.")
+def drive_resumes_zip(drive_id):
     drive = Placement.query.get_or_404(drive_id)
 
-    user = User.query.get(session['user_id'])
+    if drive.company_id != g.company.company_id:
+        flash("You do not have permisson to download these Resumes", "error")
+        return redirect(url_for('main.company_dashboard'))
 
-    if drive.company_id != user.company_profile.company_id:
-        flash("You do not have permisson to view these Applications", "error")
-        return redirect(url_for('company_dashboard'))
-    
-    return render_template("view_applications.html", drive=drive, applications=drive.applications)
+    return resumes.zip_response(resumes.drive_resumes(drive_id), f"drive_{drive_id}_resumes")
+
+
+@bp.route('/resume/<int:student_id>')                                  #DOWNLOAD UPLOADED RESUME
+def download_resume(student_id):
+    identity = load_identity()
+    if identity is None:
+        flash("Please login to download resumes.", "info")
+        return redirect(url_for('main.login'))
+    if not resumes.can_download(identity, student_id):
+        abort(403)
+
+    student = db.session.get(Student, student_id)
+    if student is None or not student.resume_sha256:
+        abort(404)
 
-@app.route('/student_edit_profile', methods=["GET", "POST"])          #STUDENT PROFILE EDIT ROUTE
+    return resumes.send_resume(student.resume_sha256, student.resume_name)
+
+@bp.route('/student_edit_profile', methods=["GET", "POST"])          #STUDENT PROFILE EDIT ROUTE
+@role_required("Student", "Unauthorized Access.")
 def student_edit_profile():
-    if 'user_id' not in session or session.get('role') != "Student":
-        flash("Unauthorized Access.", "error")
-        return redirect(url_for('login'))
-    user = User.query.get(session['user_id'])
-    student = user.student_profile
+    student = db.session.get(Student, g.student.student_id)   # real row, it is edited below
 
     if request.method == "POST":
         try:
@@ -362,7 +501,7 @@ def student_edit_profile():
 
             db.session.commit()
             flash("Updated Successful.", "success")
-            return redirect(url_for('student_dashboard'))
+            return redirect(url_for('main.student_dashboard'))
         
         except Exception as e:
             db.session.rollback()
@@ -371,98 +510,185 @@ def student_edit_profile():
     return render_template("student_edit_profile.html", student=student)
 
 
+@bp.route('/student/resume', methods=["POST"])                        #UPLOAD RESUME
+@role_required("Student", "Unauthorized Access.")
+def upload_resume():
+    try:
+        digest, name = resumes.receive_upload()
+    except resumes.InvalidResume as e:
+        flash(str(e), "error")
+        return redirect(url_for('main.student_edit_profile'))
+    except RequestEntityTooLarge:
+        flash(f"Resumes can be at most {current_app.config['RESUME_MAX_BYTES'] // (1024 * 1024)} MB.", "error")
+        return redirect(url_for('main.student_edit_profile'))
+
+    student = db.session.get(Student, g.student.student_id)
+    student.resume_sha256 = digest
+    student.resume_name = name
+    db.session.commit()
+    flash("Resume uploaded.", "success")
 
-@app.route('/update-status/<int:app_id>/<string:new_status>')          #UPDATE STATUS ROUTE
-def update_status(app_id, new_status):
-    if 'user_id' not in session and session.get('role') != 'Company':
-        flash("unauthorized Access.", "error")
-        return redirect(url_for('login'))
-    
-    application = Applications.query.get_or_404(app_id)
-    drive = Placement.query.get(application.drive_id)
-    user = User.query.get(session['user_id'])
+    return redirect(url_for('main.student_dashboard'))
 
-    if drive.company_id != user.company_profile.company_id:
+
+
+@bp.route('/update-status/<int:app_id>/<string:new_status>')          #UPDATE STATUS ROUTE
+@role_required("Company", "unauthorized Access.")
+def update_status(app_id, new_status):
+    if new_status not in APPLICATION_STATUSES:
+        flash(f"Unknown status {new_status}.", "error")
+        return redirect(url_for('main.company_dashboard'))
+
+    # application and the owner of its drive in one query
+    row = (db.session.query(Applications, Placement.company_id)
+           .join(Placement, Applications.drive_id == Placement.drive_id)
+           .filter(Applications.app_id == app_id)
+           .first_or_404())
+    application, company_id = row
+
+    if company_id != g.company.company_id:
         flash("Permission denied.", "error")
-        return redirect(url_for('company_dashboard'))
+        return redirect(url_for('main.company_dashboard'))
     
     application.status = new_status
     db.session.commit()
     flash(f"Application is marked as {new_status}", "success")
 
-    return redirect(url_for('view_applications', drive_id=drive.drive_id))
+    return redirect(url_for('main.view_applications', drive_id=application.drive_id))
+
+
+@bp.route('/drive/<int:drive_id>/applications/status', methods=['POST'])   #BULK STATUS UPDATE
+@role_required("Company", "Unauthorized Access.")
+def bulk_update_status(drive_id):
+    company_id = db.session.query(Placement.company_id).filter(Placement.drive_id == drive_id).scalar()
+    if company_id is None:
+        abort(404)
+    if company_id != g.company.company_id:
+        flash("Permission denied.", "error")
+        return redirect(url_for('main.company_dashboard'))
+
+    new_status = parse_status(request.form.get('status'))
+    if new_status is None:
+        flash("Please choose a valid status.", "error")
+        return redirect(url_for('main.view_applications', drive_id=drive_id))
+
+    if request.form.get('rule') == 'cgpa':
+        # every application of this drive with cgpa >= min_cgpa (optionally only those in one status)
+        min_cgpa = request.form.get('min_cgpa', type=float)
+        only_status = request.form.get('only_status') or None
+        if min_cgpa is None or (only_status and parse_status(only_status) is None):
+            flash("Please enter a valid CGPA and status.", "error")
+            return redirect(url_for('main.view_applications', drive_id=drive_id))
+        changed = update_statuses(drive_id, new_status, min_cgpa=min_cgpa, only_status=only_status)
+    else:
+        app_ids = request.form.getlist('app_ids', type=int)
+        if not app_ids:
+            flash("No applications selected.", "error")
+            return redirect(url_for('main.view_applications', drive_id=drive_id))
+        changed = update_statuses(drive_id, new_status, app_ids=app_ids)
+
+    flash(f"{changed} application(s) marked as {new_status}.", "success")
+    return redirect(url_for('main.view_applications', drive_id=drive_id))
 
 
-@app.route('/admin/dashboard')                                #ADMIN DASHBOARD
+@bp.route('/admin/dashboard')                                #ADMIN DASHBOARD
+@role_required("Admin", "You are not allowed.")
 def admin_dashboard():
     search_query = request.args.get('search_query', '').strip()
 
-    student_q = Student.query
-    company_q = Company.query
-
-    drives = Placement.query.all()
+    per_page = get_page_size()
+    student_cursor = request.args.get('students')
+    company_cursor = request.args.get('companies')
+    drive_cursor = request.args.get('drives')
 
     if search_query:
+        # Ranked full-text search (FTS5) over names, branches, websites and job descriptions
+        students = search_students(search_query, student_cursor, per_page)
+        companies = search_companies(search_query, company_cursor, per_page)
+        drive_table = render_template('_admin_drives.html',
+                                      drives=search_drives(search_query, drive_cursor, per_page))
+    else:
+        students = keyset_page(Student.query, [Student.student_id], student_cursor, per_page)
+        companies = keyset_page(Company.query, [Company.company_id], company_cursor, per_page)
+        drive_table = cached_fragment(
+            "admin_drives", ["drives"],
+            lambda: render_template('_admin_drives.html',
+                                    drives=keyset_page(all_drives_query(), DRIVE_ORDER, drive_cursor, per_page)))
 
-        is_id = search_query.isdigit()
+    return render_template('admin_dashboard.html',
+                            students=students,
+                            companies=companies,
+                            drive_table=drive_table,
+                            search_query=search_query)
 
-        student_q = student_q.filter(
-            or_(
-                Student.full_name.ilike(f"%{search_query}%"),
-                Student.student_id == int(search_query) if is_id else False
-            )
-        )
 
 
-        company_q = company_q.filter(
-            or_(
-                Company.company_name.ilike(f"%{search_query}%"),
-                Company.company_id == int(search_query) if is_id else False
-            )
-        )
+@bp.route('/admin/export/placements.<any(csv, ndjson):fmt>')          #ADMIN PLACEMENT REPORT
+@role_required("Admin", "You are not allowed.")
+def export_placements(fmt):
+    company_id = request.args.get('company_id', type=int)            # optional, one company only
+    filename = f"company_{company_id}_placements" if company_id else "placement_report"
 
-    return render_template('admin_dashboard.html',
-                            students=student_q.all(),
-                            companies=company_q.all(),
-                            drives=drives,
-                            search_query=search_query)
+    return export_response(placement_report(company_id=company_id), fmt, filename)
 
 
+@bp.route('/admin/metrics')                                  #ADMIN METRICS (PROMETHEUS TEXT FORMAT)
+@role_required("Admin", "You are not allowed.")
+def admin_metrics():
+    return instrumentation.prometheus_text(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
-@app.route('/admin/delete_student/<int:student_id>')                  #ADMIN STUDENT DELETE
+
+@bp.route('/admin/stats')                                    #ADMIN PLACEMENT STATISTICS
+@role_required("Admin", "You are not allowed.")
+def admin_stats():
+    # Everything here is read from the summary tables kept by aggregates.py
+    per_page = get_page_size()
+    branches = BranchStats.query.order_by(BranchStats.branch).all()
+    companies = keyset_page(
+        db.session.query(Company.company_id, Company.company_name, CompanyStats.drives, CompanyStats.applicants)
+        .outerjoin(CompanyStats, CompanyStats.company_id == Company.company_id),
+        [Company.company_id], request.args.get('companies'), per_page)
+    drives = keyset_page(drive_stats_query(), [Placement.drive_id], request.args.get('drives'), per_page)
+
+    return render_template('admin_stats.html', branches=branches, companies=companies, drives=drives,
+                           seasons=season_report(), fragment_cache=hit_ratios())
+
+
+@bp.route('/admin/delete_student/<int:student_id>')                  #ADMIN STUDENT DELETE
+@role_required("Admin", "You are not allowed.")
 def delete_student(student_id):
     student = Student.query.get_or_404(student_id)
-    db.session.delete(student)
+    student.deleted_at = datetime.now()                   # SOFT DELETE, `flask purge-deleted` removes it for good
     db.session.commit()
     flash("Student profile deleted.", "success")
 
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/admin/delete_company/<int:company_id>')                  #ADMIN COMPANY DELETE
+@bp.route('/admin/delete_company/<int:company_id>')                  #ADMIN COMPANY DELETE
+@role_required("Admin", "You are not allowed.")
 def delete_company(company_id):
     company = Company.query.get_or_404(company_id)
-    db.session.delete(company)
+    company.is_blacklisted = True                         # its drives disappear for students right away
+    company.deleted_at = datetime.now()                   # SOFT DELETE, `flask purge-deleted` removes it for good
     db.session.commit()
     flash("Company profile deleted.", "success")
 
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
 
-@app.route('/admin/approve_company/<int:company_id>')                           ##ADMIN Company approval
+@bp.route('/admin/approve_company/<int:company_id>')                           ##ADMIN Company approval
+@role_required("Admin", "You are not allowed.")
 def approve_company(company_id):
-    company = Company.query.get(company_id)
+    company = Company.query.get_or_404(company_id)
     company.approval_status="Approved"
     db.session.commit()
 
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
 
-@app.route('/admin/edit_student/<int:student_id>', methods=['GET', 'POST'])       #ADMIN EDIT STUDENT
+@bp.route('/admin/edit_student/<int:student_id>', methods=['GET', 'POST'])       #ADMIN EDIT STUDENT
+@role_required("Admin", "You are not allowed.")
 def edit_student(student_id):
-    if session['role'] != "Admin":
-        flash("You are not allowed.", "error")
-        return redirect(url_for('login'))
-    
     student = Student.query.get_or_404(student_id)
 
     if request.method == "POST":
@@ -474,7 +700,7 @@ def edit_student(student_id):
 
             db.session.commit()
             flash("Student profile updated successsfully.", "success")
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         
         except Exception as e:
             db.session.rollback()
@@ -483,7 +709,8 @@ def edit_student(student_id):
     return render_template('edit_student.html', student=student)
 
 
-@app.route('/admin/blacklist_company/<int:company_id>')
+@bp.route('/admin/blacklist_company/<int:company_id>')
+@role_required("Admin", "You are not allowed.")
 def blacklist_company(company_id):
 
     company = Company.query.get_or_404(company_id)
@@ -498,13 +725,14 @@ def blacklist_company(company_id):
     else:
         flash(f"{company.company_name} is stored to Whitelist.", "success")
 
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
 
 
     
     
 if __name__=="__main__":
-
-        
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    with app.app_context():
+        init_db()
+    app.run(debug=True)
@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Student, Company, Placement, Applications, DRIVE_OPEN
+import aggregates
+import fragments
+
+
+# Application submission in one statement.
+#
+#   INSERT INTO application (...) SELECT ... FROM placement_drives JOIN company_profile
+#   WHERE <drive open, deadline ahead, company not blacklisted, student cgpa high enough>
+#   ON CONFLICT DO NOTHING
+#
+# The unique index on (student_id, drive_id) settles double clicks and racing
+# workers inside the database. Only when nothing was inserted does a second
+# query find out why. The form carries an idempotency key that is stored on the
+# application: resubmitting the same form reports the original success instead
+# of "already applied". Keys only have to be unique per student and drive.
+
+APPLIED = "applied"                                        # inserted now
+REPLAYED = "replayed"                                      # same submission seen before, it had succeeded
+DUPLICATE = "duplicate"                                    # applied earlier with another submission
+NOT_ELIGIBLE = "not_eligible"
+CLOSED = "closed"                                          # closed, past its deadline or company blacklisted
+MISSING = "missing"
+
+MAX_KEY_LENGTH = Applications.idempotency_key.type.length  # longer keys must be refused by the caller
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _eligible_drive(student_id, drive_id, now):
+    student_cgpa = select(Student.cgpa).where(Student.student_id == student_id).scalar_subquery()
+    return (
+        select(Placement.drive_id)
+        .join(Company, Company.company_id == Placement.company_id)
+        .where(
+            Placement.drive_id == drive_id,
+            Placement.drive_status == DRIVE_OPEN,
+            Placement.deadline > now,
+            Company.is_blacklisted == False,
+            Placement.min_cgpa <= student_cgpa,
+        )
+    )
+
+
+def _why_not(student_id, drive_id, idempotency_key, now):
+    row = db.session.execute(
+        select(
+            Placement.drive_status, Placement.deadline, Placement.min_cgpa, Company.is_blacklisted,
+            Applications.app_id, Applications.idempotency_key,
+            select(Student.cgpa).where(Student.student_id == student_id).scalar_subquery().label("cgpa"),
+        )
+        .join(Company, Company.company_id == Placement.company_id)
+        .outerjoin(Applications, and_(Applications.drive_id == Placement.drive_id,
+                                      Applications.student_id == student_id))
+        .where(Placement.drive_id == drive_id)
+    ).first()
+
+    if row is None:
+        return MISSING
+    if row.app_id is not None:
+        return REPLAYED if idempotency_key and row.idempotency_key == idempotency_key else DUPLICATE
+    if row.drive_status != DRIVE_OPEN or row.deadline <= now or row.is_blacklisted:
+        return CLOSED
+    if row.cgpa is None or row.cgpa < row.min_cgpa:
+        return NOT_ELIGIBLE
+    return DUPLICATE                                       # lost a race with a concurrent delete / insert
+
+
+def new_idempotency_key():                                 # USED BY _student_drives.html
+    return uuid.uuid4().hex
+
+
+def submit_application(student_id, drive_id, idempotency_key=None):
+    # Returns one of the outcomes above and commits
+    now = datetime.now()
+    eligible = _eligible_drive(student_id, drive_id, now)
+    source = eligible.with_only_columns(
+        literal(student_id).label("student_id"),
+        Placement.drive_id,
+        literal(datetime.now(timezone.utc)).label("app_date"),
+        literal("Applied").label("status"),
+        literal(idempotency_key, Applications.idempotency_key.type).label("idempotency_key"),
+    )
+
+    insert = _DIALECT_INSERTS[db.engine.dialect.name]
+    stmt = (
+        insert(Applications)
+        .from_select(["student_id", "drive_id", "app_date", "status", "idempotency_key"], source)
+        .on_conflict_do_nothing(index_elements=["student_id", "drive_id"])
+    )
+
+    conn = db.session.connection()
+    if conn.execute(stmt).rowcount == 1:
+        aggregates.application_added(conn, drive_id)       # raw INSERT skips the ORM events
+        db.session.commit()
+        fragments.bump("applications")
+        return APPLIED
+
+    outcome = _why_not(student_id, drive_id, idempotency_key, now)
+    db.session.rollback()
+    return outcome
@@ -0,0 +1,195 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, delete, distinct, func, insert, literal, select, update
+
+from models import (db, Student, Company, Placement, Applications, ArchivedDrive, ArchivedApplication,
+                    DRIVE_CLOSED)
+import aggregates
+import eligibility
+import fragments
+import jobs
+
+
+# Archival of past placement seasons, and purging of soft-deleted accounts.
+#
+# Closed drives whose deadline is older than ARCHIVE_AFTER_DAYS are moved, with
+# their applications, to placement_drives_archive / application_archive. Each
+# chunk of ARCHIVE_CHUNK drives is copied with INSERT ... SELECT and deleted in
+# one transaction, so the live tables and their indexes only hold the current
+# season and a crash half way leaves nothing half moved. Seasons start in
+# SEASON_START_MONTH, the admin statistics page reports them year over year.
+#
+#   flask --app app archive-drives                     # older than ARCHIVE_AFTER_DAYS
+#   flask --app app archive-drives --before 2026-07-01
+#   flask --app app purge-deleted                      # soft-deleted more than PURGE_AFTER_DAYS ago
+
+ARCHIVE_CHUNK = 200
+
+
+def season_of(when, start_month):
+    return when.year if when.month >= start_month else when.year - 1
+
+
+def season_label(season, start_month):
+    return str(season) if start_month == 1 else f"{season}-{(season + 1) % 100:02d}"
+
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _archive_chunk(drive_ids, season, archived_at):
+    # Returns the number of applications archived
+    conn = db.session.connection()
+    in_chunk = Placement.drive_id.in_(drive_ids)
+    apps_in_chunk = Applications.drive_id.in_(drive_ids)
+
+    conn.execute(insert(ArchivedDrive).from_select(
+        ["drive_id", "season", "company_id", "company_name", "job_title", "min_cgpa", "deadline",
+         "drive_status", "job_description", "archived_at"],
+        select(Placement.drive_id, literal(season), Placement.company_id, Company.company_name,
+               Placement.job_title, Placement.min_cgpa, Placement.deadline, Placement.drive_status,
+               Placement.job_description, literal(archived_at))
+        .join(Company, Company.company_id == Placement.company_id)
+        .where(in_chunk),
+    ))
+    conn.execute(insert(ArchivedApplication).from_select(
+        ["app_id", "season", "student_id", "drive_id", "branch", "app_date", "status"],
+        select(Applications.app_id, literal(season), Applications.student_id, Applications.drive_id,
+               Student.branch, Applications.app_date, Applications.status)
+        .outerjoin(Student, Student.student_id == Applications.student_id)
+        .where(apps_in_chunk),
+    ))
+
+    # raw DELETEs skip the ORM events, same bookkeeping as jobs.delete_company
+    counts = Counter({(drive_id, status): n for drive_id, status, n in conn.execute(
+        select(Applications.drive_id, Applications.status, func.count())
+        .where(apps_in_chunk).group_by(Applications.drive_id, Applications.status))})
+    selected = set(conn.execute(
+        select(Applications.student_id).where(apps_in_chunk, Applications.status == "Selected").distinct()
+    ).scalars())
+    placed_before = aggregates.placed_students(conn, selected) if selected else set()
+    drives = conn.execute(select(Placement.drive_id, Placement.company_id).where(in_chunk)).all()
+
+    conn.execute(delete(Applications).where(apps_in_chunk))
+    aggregates.applications_removed(conn, counts)
+    if selected:
+        aggregates.placements_changed(conn, placed_before, aggregates.placed_students(conn, selected))
+    aggregates.drives_removed(conn, drives)
+    conn.execute(delete(Placement).where(in_chunk))
+
+    return sum(counts.values())
+
+
+def archive_drives(before, start_month=None, chunk_size=ARCHIVE_CHUNK):
+    # Returns (drives archived, applications archived)
+    if start_month is None:
+        start_month = current_app.config["SEASON_START_MONTH"]
+
+    by_season = defaultdict(list)
+    for drive_id, deadline in db.session.execute(
+        select(Placement.drive_id, Placement.deadline)
+        .where(Placement.drive_status == DRIVE_CLOSED, Placement.deadline < before)
+        .order_by(Placement.deadline, Placement.drive_id)
+    ):
+        by_season[season_of(deadline, start_month)].append(drive_id)
+
+    archived_at = datetime.now()
+    drives = applications = 0
+    for season, drive_ids in sorted(by_season.items()):
+        for chunk in _chunks(drive_ids, chunk_size):
+            applications += _archive_chunk(chunk, season, archived_at)
+            db.session.commit()
+            drives += len(chunk)
+
+    if drives:
+        eligibility.invalidate("drives")
+        fragments.bump("drives", "applications")
+    return drives, applications
+
+
+def season_report(start_month=None):
+    # One row per archived season, newest first
+    if start_month is None:
+        start_month = current_app.config["SEASON_START_MONTH"]
+
+    drives = dict(db.session.execute(
+        select(ArchivedDrive.season, func.count()).group_by(ArchivedDrive.season)).all())
+    selected = case((ArchivedApplication.status == "Selected", ArchivedApplication.student_id))
+    rows = db.session.execute(
+        select(
+            ArchivedApplication.season,
+            func.count().label("applications"),
+            func.count(selected).label("selected"),
+            func.count(distinct(selected)).label("placed"),
+        )
+        .group_by(ArchivedApplication.season)
+    ).all()
+    per_season = {row.season: row for row in rows}
+
+    return [
+        {
+            "season": season_label(season, start_month),
+            "drives": drives.get(season, 0),
+            "applications": per_season[season].applications if season in per_season else 0,
+            "selected": per_season[season].selected if season in per_season else 0,
+            "placed": per_season[season].placed if season in per_season else 0,
+        }
+        for season in sorted(drives.keys() | per_season.keys(), reverse=True)
+    ]
+
+
+def purge_deleted(before):
+    # Hard deletes what was soft-deleted before `before`. Returns (students, companies).
+    students = db.session.execute(
+        select(Student).where(Student.deleted_at < before).execution_options(include_deleted=True)
+    ).scalars().all()
+    for student in students:
+        db.session.delete(student)                         # ORM delete, the statistics follow
+
+    # Companies can own a lot of rows, their deletion runs as a job (jobs.delete_company)
+    company_ids = db.session.execute(
+        select(Company.company_id)
+        .where(Company.deleted_at < before, Company.approval_status != "Deleting")
+        .execution_options(include_deleted=True)
+    ).scalars().all()
+    if company_ids:
+        db.session.execute(update(Company).where(Company.company_id.in_(company_ids))
+                           .values(approval_status="Deleting", row_version=Company.row_version + 1),
+                           execution_options={"synchronize_session": False})
+    for company_id in company_ids:
+        jobs.enqueue("delete_company", company_id=company_id)
+    db.session.commit()
+
+    return len(students), len(company_ids)
+
+
+@click.command("archive-drives")
+@click.option("--before", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Archive closed drives with a deadline before this date (default: ARCHIVE_AFTER_DAYS ago).")
+@click.option("--chunk-size", default=ARCHIVE_CHUNK, show_default=True, help="Drives per transaction.")
+@with_appcontext
+def archive_command(before, chunk_size):
+    """Move closed drives of past seasons and their applications to the archive tables."""
+    if before is None:
+        before = datetime.now() - timedelta(days=current_app.config["ARCHIVE_AFTER_DAYS"])
+    drives, applications = archive_drives(before, chunk_size=chunk_size)
+    click.echo(f"{drives} drive(s) and {applications} application(s) archived.")
+
+
+@click.command("purge-deleted")
+@click.option("--days", default=None, type=int, help="Purge rows soft-deleted this many days ago (default: PURGE_AFTER_DAYS).")
+@with_appcontext
+def purge_command(days):
+    """Permanently delete students and companies that were soft-deleted long enough ago."""
+    if days is None:
+        days = current_app.config["PURGE_AFTER_DAYS"]
+    students, companies = purge_deleted(datetime.now() - timedelta(days=days))
+    click.echo(f"{students} student(s) deleted, {companies} company deletion(s) queued.")
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from types import SimpleNamespace
+
+from flask import flash, g, redirect, session, url_for
+from models import db, User, Student, Company, on_commit
+
+
+# Who is logged in, resolved once per request.
+# load_identity() fetches the user together with its student / company profile
+# in ONE joined query and keeps the result on `g`. A small LRU (IDENTITY_TTL
+# seconds) saves even that query on repeat requests. Entries are dropped as soon
+# as a change to the user or its profile is committed.
+#
+#   @app.route('/dashboard/student')
+#   @role_required("Student", "Please login as a Student to access the student dashboard")
+#   def student_dashboard():
+#       g.student.cgpa ...
+
+IDENTITY_TTL = 30
+IDENTITY_CACHE_SIZE = 2048
+
+STUDENT_FIELDS = ["student_id", "full_name", "cgpa", "branch", "resume_url", "resume_sha256", "resume_name"]
+COMPANY_FIELDS = ["company_id", "company_name", "website", "hr_contact", "approval_status", "is_blacklisted"]
+
+
+class IdentityCache:
+    def __init__(self, ttl=IDENTITY_TTL, max_size=IDENTITY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()                        # user_id -> (expires at, identity)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return item[1]
+
+    def put(self, user_id, identity):
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + self.ttl, identity)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def _fetch_identity(user_id):
+    row = (
+        db.session.query(
+            User.id, User.email, User.role,
+            *[getattr(Student, f) for f in STUDENT_FIELDS],
+            *[getattr(Company, f) for f in COMPANY_FIELDS],
+        )
+        .outerjoin(Student, Student.user_id == User.id)
+        .outerjoin(Company, Company.user_id == User.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    student = None
+    if row.student_id is not None:
+        student = SimpleNamespace(**{f: getattr(row, f) for f in STUDENT_FIELDS})
+    company = None
+    if row.company_id is not None:
+        company = SimpleNamespace(**{f: getattr(row, f) for f in COMPANY_FIELDS})
+    if student is None and company is None and (row.role or "").strip().capitalize() in ("Student", "Company"):
+        return None                                        # profile was soft-deleted, treat as logged out
+
+    return SimpleNamespace(user_id=row.id, email=row.email, role=row.role, student=student, company=company)
+
+
+def load_identity():
+    # Fills g.identity / g.student / g.company for the logged in user (None when logged out)
+    if "identity" in g:
+        return g.identity
+
+    user_id = session.get("user_id")
+    identity = None
+    if user_id is not None:
+        identity = identity_cache.get(user_id)
+        if identity is None:
+            identity = _fetch_identity(user_id)
+            if identity is not None:
+                identity_cache.put(user_id, identity)
+
+    g.identity = identity
+    g.student = identity.student if identity else None
+    g.company = identity.company if identity else None
+
+    return identity
+
+
+def role_required(role, message="Unauthorized access.", category="error"):
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if session.get("role") != role or load_identity() is None:
+                flash(message, category)
+                return redirect(url_for("main.login"))
+
+            if role == "Student" and g.student is None:
+                flash("Student profile not found. Please contact support.", "error")
+                return redirect(url_for("main.index"))
+            if role == "Company" and g.company is None:
+                flash("Company profile not found.", "error")
+                return redirect(url_for("main.index"))
+
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+# Invalidation: remember touched user ids during flush, drop them after commit
+
+def _user_id_of(target):
+    return target.id if isinstance(target, User) else target.user_id
+
+
+def _discard_all(user_ids):
+    for user_id in user_ids:
+        identity_cache.discard(user_id)
+
+
+on_commit((User, Student, Company), "identity_dirty", _discard_all,
+          lambda mapper, connection, target: [_user_id_of(target)])
@@ -0,0 +1,112 @@
+# Login storm: logins/sec and how a cheap page behaves while passwords are hashed.
+#
+#   python benchmarks/bench_login.py --clients 16 --logins 4
+#   PASSWORD_HASH_WORKERS=0 python benchmarks/bench_login.py            # compare with hashing on the request thread
+#
+# Every client logs in --logins times through the real route. Meanwhile one more
+# thread keeps requesting the home page and records its latency. Rate limiting is
+# switched off, the point is to measure hashing.
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DEADLINE_SCHEDULER", "0")
+os.environ.setdefault("JOB_WORKER_THREAD", "0")
+os.environ["LOGIN_RATE_LIMIT"] = "0"
+
+from app import create_app, init_db
+from models import db, User, Student
+from passwords import hash_password
+
+app = create_app()
+with app.app_context():
+    init_db()
+
+PASSWORD = "bench-password"
+
+
+def seed(clients):
+    with app.app_context():
+        hashed = hash_password(PASSWORD)                   # real hash with the configured method
+        emails = []
+        for i in range(clients):
+            email = f"bench-login-{i}-{time.time()}@bench.local"
+            user = User(email=email, password=hashed, role="Student")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Student(user_id=user.id, full_name=f"Bench {i}", cgpa=8, branch="CSE"))
+            emails.append(email)
+        db.session.commit()
+    return emails
+
+
+def run_client(email, logins):
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    for _ in range(logins):
+        start = time.perf_counter()
+        response = client.post("/login", data={"email": email, "password": PASSWORD})
+        if response.status_code != 302:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+        client.get("/logout")
+    return errors, latencies
+
+
+def probe(stop, latencies):
+    client = app.test_client()
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get("/")
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=4, help="logins per client")
+    args = parser.parse_args()
+
+    emails = seed(args.clients)
+    print(f"hash method: {app.config['PASSWORD_HASH_METHOD']}  workers: {app.config['PASSWORD_HASH_WORKERS']}")
+
+    stop = threading.Event()
+    probe_latencies = []
+    prober = threading.Thread(target=probe, args=(stop, probe_latencies))
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(run_client, emails, [args.logins] * len(emails)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    prober.join()
+
+    latencies = [l for r in results for l in r[1]]
+    errors = sum(r[0] for r in results)
+    print(f"{args.clients} clients x {args.logins} logins  errors: {errors}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} logins/sec")
+    print(f"login latency p50: {pct(latencies, 0.5):.0f} ms  p99: {pct(latencies, 0.99):.0f} ms")
+    print(f"home page during the storm p50: {pct(probe_latencies, 0.5):.1f} ms  "
+          f"p99: {pct(probe_latencies, 0.99):.1f} ms  ({len(probe_latencies)} requests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Applicant ranking benchmark: top-K selection vs scoring and sorting every applicant.
+#
+#   python benchmarks/bench_ranking.py --applicants 50000 --top 50
+#
+# Works on synthetic in-memory rows (no database), with and without NumPy,
+# so only the scoring / selection in ranking.py is measured.
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ranking
+
+BRANCHES = ["CSE", "ECE", "ME", "CE", "EE", "IT", "Chemical", "Biotech"]
+WEIGHTS = (1.0, 0.5, 0.25)
+HALF_LIFE = 7.0
+
+
+def rows(n):
+    rnd = random.Random(7)
+    now = datetime.now()
+    return [SimpleNamespace(app_id=i, cgpa=round(rnd.uniform(6, 10), 2), branch=rnd.choice(BRANCHES),
+                            app_date=now - timedelta(minutes=rnd.randrange(60 * 24 * 30)))
+            for i in range(1, n + 1)]
+
+
+def full_sort(applicants, k, preferred):
+    scores = applicants.scores(WEIGHTS, HALF_LIFE, preferred)
+    order = sorted(range(len(applicants)), key=lambda i: (-scores[i], applicants.app_ids[i]))
+    return [int(applicants.app_ids[i]) for i in order[:k]]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=50000)
+    parser.add_argument("--top", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = rows(args.applicants)
+    preferred = ["CSE", "IT"]
+    numpy = ranking.np
+
+    print(f"{'mode':<10} {'build ms':>9} {'top-k ms':>9} {'sort ms':>9}")
+    for mode in (["numpy"] if numpy is not None else []) + ["python"]:
+        ranking.np = numpy if mode == "numpy" else None
+        build_ms = timed(lambda: ranking.DriveApplicants(data, 6.0, None), args.repeat)
+        applicants = ranking.DriveApplicants(data, 6.0, None)
+
+        top = [app_id for app_id, _ in applicants.top(args.top, WEIGHTS, HALF_LIFE, preferred)]
+        assert top == full_sort(applicants, args.top, preferred)
+
+        top_ms = timed(lambda: applicants.top(args.top, WEIGHTS, HALF_LIFE, preferred), args.repeat)
+        sort_ms = timed(lambda: full_sort(applicants, args.top, preferred), args.repeat)
+        print(f"{mode:<10} {build_ms:>9.2f} {top_ms:>9.2f} {sort_ms:>9.2f}")
+    ranking.np = numpy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# Route benchmark suite: latency, SQL statements and memory of the main pages.
+#
+#   python benchmarks/bench_routes.py --students 20000 --companies 200 --json results.json
+#   python benchmarks/bench_routes.py --json new.json --compare results.json      # regression check
+#   FRAGMENT_CACHE=none python benchmarks/bench_routes.py                          # without the page cache
+#
+# Seeds a throw-away SQLite database (or DATABASE_URL when set) with
+# benchmarks/datagen.py, then drives the real routes through Flask's test
+# client. Per scenario it reports p50 / p99 latency, SQL statements per request
+# and the peak Python memory allocated while serving one request (tracemalloc).
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["LOGIN_RATE_LIMIT"] = "0"                       # every scenario logs in a lot
+os.environ.setdefault("DEADLINE_SCHEDULER", "0")
+os.environ.setdefault("JOB_WORKER_THREAD", "0")
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from app import create_app, init_db
+from models import db, Student, Applications
+from datagen import generate, PASSWORD
+
+app = create_app()
+with app.app_context():
+    init_db()
+
+MEMORY_SAMPLES = 5
+statements = [0]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements[0] += 1
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def logged_in(email, password=PASSWORD):
+    client = app.test_client()
+    response = client.post("/login", data={"email": email, "password": password})
+    assert response.status_code == 302, f"login failed for {email}"
+    return client
+
+
+def run_scenario(name, request, n):
+    # request(i) performs one request and returns the response
+    latencies, counts, errors = [], [], 0
+    for i in range(n):
+        statements[0] = 0
+        start = time.perf_counter()
+        response = request(i)
+        latencies.append(time.perf_counter() - start)
+        counts.append(statements[0])
+        if response.status_code >= 400:
+            errors += 1
+
+    peak = 0
+    for i in range(MEMORY_SAMPLES):
+        tracemalloc.start()
+        request(n + i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "requests": n,
+        "errors": errors,
+        "p50_ms": round(pct(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(pct(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / n * 1000, 3),
+        "queries_per_request": round(sum(counts) / n, 2),
+        "max_queries": max(counts),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def scenarios(data, n):
+    with app.app_context():
+        # the strongest student still has drives to apply to, the busiest drive is reviewed
+        student = db.session.execute(
+            select(Student.student_id, Student.user_id).where(Student.student_id.in_(data["student_ids"]))
+            .order_by(Student.cgpa.desc()).limit(1)).one()
+        student_email = data["student_emails"][data["student_ids"].index(student.student_id)]
+        applied = set(db.session.execute(
+            select(Applications.drive_id).where(Applications.student_id == student.student_id)).scalars())
+        to_apply = [d for d in data["drive_ids"] if d not in applied]
+
+        busiest = db.session.execute(
+            select(Applications.drive_id, func.count().label("n"))
+            .where(Applications.drive_id.in_(data["drive_ids"]))
+            .group_by(Applications.drive_id).order_by(func.count().desc()).limit(1)).one()
+        drive_index = data["drive_ids"].index(busiest.drive_id)
+        company_email = data["company_emails"][drive_index // (len(data["drive_ids"]) // len(data["company_ids"]))]
+
+    login_client = app.test_client()
+    student_client = logged_in(student_email)
+    company_client = logged_in(company_email)
+    admin_client = logged_in("admin@gmail.com", "admin1234")
+
+    def login(i):
+        response = login_client.post("/login", data={"email": data["student_emails"][i % len(data["student_emails"])],
+                                                     "password": PASSWORD})
+        login_client.get("/logout")
+        return response
+
+    return [
+        ("login", login, min(n, 20)),                      # a real password hash each time, keep it short
+        ("student_dashboard", lambda i: student_client.get("/dashboard/student"), n),
+        ("apply_for_job", lambda i: student_client.post(f"/apply/{to_apply[i % len(to_apply)]}"), n),
+        ("company_dashboard", lambda i: company_client.get("/dashboard/company"), n),
+        ("view_applications", lambda i: company_client.get(f"/view-applications/{busiest.drive_id}"), n),
+        ("admin_dashboard", lambda i: admin_client.get("/admin/dashboard"), n),
+        ("admin_search", lambda i: admin_client.get("/admin/dashboard?search_query=sharma"), n),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\nagainst {baseline_path}:")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("p50_ms", "p99_ms", "queries_per_request", "peak_kb"):
+            if old[key]:
+                changes.append(f"{key} {100 * (result[key] - old[key]) / old[key]:+.0f}%")
+        print(f"  {name:<20} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--companies", type=int, default=100)
+    parser.add_argument("--drives-per-company", type=int, default=5)
+    parser.add_argument("--applications-per-student", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare with")
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        data = generate(args.students, args.companies, args.drives_per_company, args.applications_per_student,
+                        args.seed)
+        seed_seconds = time.perf_counter() - start
+        print(f"backend: {db.engine.dialect.name}  seeded {data['applications']} applications "
+              f"in {seed_seconds:.1f}s")
+
+    results = {}
+    print(f"{'scenario':<20} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak kB':>8} {'errors':>7}")
+    for name, request, n in scenarios(data, args.requests):
+        result = results[name] = run_scenario(name, request, n)
+        print(f"{name:<20} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['queries_per_request']:>8.1f} "
+              f"{result['peak_kb']:>8.0f} {result['errors']:>7}")
+
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"process peak RSS: {max_rss_kb / 1024:.0f} MB")
+
+    if args.json:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "backend": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+                "fragment_cache": app.config["FRAGMENT_CACHE"],
+                "volumes": {k: getattr(args, k) for k in ("students", "companies", "drives_per_company",
+                                                          "applications_per_student", "requests", "seed")},
+                "seed_seconds": round(seed_seconds, 2),
+                "max_rss_kb": max_rss_kb,
+            },
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.json}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Admin search benchmark: FTS5 index vs the old leading-wildcard ILIKE scan.
+#
+#   python benchmarks/bench_search.py --rows 100000
+#
+# Builds the app with create_app() on a throw-away SQLite database in a temp dir,
+# fills it with synthetic students / companies / drives and times both search paths.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+import search
+from app import create_app
+from migrations import upgrade_db
+from models import db
+
+FIRST = ["Aarav", "Vivaan", "Aditya", "Diya", "Ananya", "Ishaan", "Kavya", "Rohan", "Meera", "Arjun"]
+LAST = ["Sharma", "Verma", "Gupta", "Mehta", "Iyer", "Reddy", "Nair", "Singh", "Das", "Joshi"]
+BRANCHES = ["CSE", "ECE", "ME", "CE", "EE", "IT", "Chemical", "Biotech"]
+ROLES = ["Data Analyst", "Backend Developer", "Frontend Engineer", "ML Engineer", "DevOps", "QA Tester"]
+QUERIES = ["sharma", "ana", "data", "rohan iyer", "backend", "zzzz", "42"]
+
+
+def seed(rows):
+    rnd = random.Random(7)
+    now = datetime.now()
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, password, role) VALUES (:id, :email, 'x', :role)"),
+                     [{"id": i, "email": f"user{i}@bench.local", "role": "Student"} for i in range(1, 2 * rows + 1)])
+        conn.execute(text("INSERT INTO student_profile (user_id, full_name, cgpa, branch) VALUES (:u, :n, :c, :b)"),
+                     [{"u": i, "n": f"{rnd.choice(FIRST)} {rnd.choice(LAST)}", "c": round(rnd.uniform(5, 10), 2),
+                       "b": rnd.choice(BRANCHES)} for i in range(1, rows + 1)])
+        conn.execute(text("INSERT INTO company_profile (user_id, company_name, hr_contact, website, is_blacklisted) "
+                          "VALUES (:u, :n, 'hr', :w, 0)"),
+                     [{"u": rows + i, "n": f"{rnd.choice(LAST)} Labs {i}", "w": f"https://c{i}.example"}
+                      for i in range(1, rows + 1)])
+        conn.execute(text("INSERT INTO placement_drives (company_id, job_title, min_cgpa, deadline, job_description) "
+                          "VALUES (:c, :t, :m, :d, :j)"),
+                     [{"c": i, "t": rnd.choice(ROLES), "m": rnd.choice([6, 7, 8]), "d": now + timedelta(days=i % 90),
+                       "j": f"{rnd.choice(ROLES)} role working on data pipelines"} for i in range(1, rows + 1)])
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"),
+        "DEADLINE_SCHEDULER": False,
+        "JOB_WORKER_THREAD": False,
+    })
+
+    with app.app_context():
+        upgrade_db()                                      # no admin account, the seed picks the user ids
+        start = time.perf_counter()
+        seed(args.rows)
+        print(f"seeded {args.rows} rows per table in {time.perf_counter() - start:.1f}s")
+
+        url = str(db.engine.url)
+        print(f"{'query':<12} {'fts ms':>9} {'ilike ms':>9}")
+        for q in QUERIES:
+            def run():
+                search.search_students(q)
+                search.search_companies(q)
+                search.search_drives(q)
+
+            search._fts_ready[url] = True
+            fts_ms = timed(run, args.repeat)
+            search._fts_ready[url] = False
+            ilike_ms = timed(run, args.repeat)
+            print(f"{q:<12} {fts_ms:>9.2f} {ilike_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
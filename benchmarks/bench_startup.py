@@ -0,0 +1,226 @@
+# Startup time and requests/sec of the production entry point (wsgi.py).
+#
+#   python benchmarks/bench_startup.py                                 # 4 preforked workers, 10 s of load
+#   python benchmarks/bench_startup.py --workers 8 --concurrency 32 --seconds 30
+#   python benchmarks/bench_startup.py --init-per-worker               # every worker runs init_db() like before
+#   python benchmarks/bench_startup.py --server gunicorn               # needs `pip install gunicorn`
+#
+# 1. Cold start: fresh interpreters time `import app`, create_app() and init_db()
+#    (migrations check + admin seed, which used to run on every import).
+# 2. Throughput: seeds a throw-away database with datagen.py, serves wsgi:app
+#    with N workers and loads a few pages from client threads for a fixed time.
+#    Reports the time from server start to the first response, requests/sec and
+#    p50 / p99 latency. The built-in "prefork" server is werkzeug's WSGI server
+#    in N processes forked after the app is built, sharing one listening socket.
+
+import argparse
+import http.client
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["LOGIN_RATE_LIMIT"] = "0"
+os.environ.setdefault("DEADLINE_SCHEDULER", "0")
+os.environ.setdefault("JOB_WORKER_THREAD", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")       # hash inline, logins are not what we measure
+
+COLD_START = """
+import time
+t0 = time.perf_counter()
+from app import create_app, init_db
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+with app.app_context():
+    init_db()
+t3 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2)
+"""
+
+PAGES = ["/dashboard/student", "/api/v1/drives", "/api/v1/applications", "/login"]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def cold_start(samples):
+    rows = []
+    for _ in range(samples):
+        out = subprocess.run([sys.executable, "-c", COLD_START], cwd=ROOT, env=os.environ,
+                             capture_output=True, text=True, check=True).stdout
+        rows.append([float(v) for v in out.strip().splitlines()[-1].split()])
+
+    for i, label in enumerate(["import app", "create_app()", "init_db()"]):
+        values = [row[i] * 1000 for row in rows]
+        print(f"  {label:<14} p50 {pct(values, 0.5):8.1f} ms   max {max(values):8.1f} ms")
+
+
+def request(port, method, path, body=None, cookie=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Cookie": cookie} if cookie else {}
+    if body is not None:
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if request(port, "GET", "/login").status == 200:
+                return
+        except OSError:
+            time.sleep(0.01)
+    raise SystemExit("server did not come up")
+
+
+def start_prefork(workers, init_per_worker):
+    # Build the app once, then fork the workers (what gunicorn --preload does)
+    from werkzeug.serving import make_server
+    from wsgi import app
+    from app import init_db
+    from models import db
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(128)
+    port = sock.getsockname()[1]
+
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.setpgid(0, 0)                               # stop() takes down anything the worker started
+            with app.app_context():
+                db.engine.dispose(close=False)
+                if init_per_worker:
+                    init_db()
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)       # no access log
+            make_server("127.0.0.1", port, app, fd=sock.fileno()).serve_forever()
+            os._exit(0)
+        pids.append(pid)
+
+    def stop():
+        for pid in pids:
+            os.killpg(pid, signal.SIGTERM)
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+    return port, stop
+
+
+def start_gunicorn(workers):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "wsgi:app"],
+        cwd=ROOT, env=os.environ,
+    )
+
+    def stop():
+        process.terminate()
+        process.wait()
+
+    return port, stop
+
+
+def load(port, emails, password, concurrency, seconds):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    cookies = []                                           # log in first, password hashing is not measured here
+    for n in range(concurrency):
+        response = request(port, "POST", "/login", urlencode({"email": emails[n % len(emails)],
+                                                              "password": password}))
+        cookies.append(response.getheader("Set-Cookie", "").split(";", 1)[0])
+    stop_at = time.monotonic() + seconds
+
+    def client(n):
+        rng = random.Random(n)
+        cookie = cookies[n]
+        mine, failed = [], 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            status = request(port, "GET", rng.choice(PAGES), cookie=cookie).status
+            mine.append(time.perf_counter() - start)
+            failed += status >= 400
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"  {len(latencies)} requests in {elapsed:.1f}s: {len(latencies) / elapsed:.0f} req/s, "
+          f"p50 {pct(latencies, 0.5) * 1000:.1f} ms, p99 {pct(latencies, 0.99) * 1000:.1f} ms, "
+          f"{errors[0]} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", choices=["prefork", "gunicorn"], default="prefork")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--cold-samples", type=int, default=5)
+    parser.add_argument("--init-per-worker", action="store_true",
+                        help="prefork only: run init_db() in every worker, the old import-time behaviour")
+    parser.add_argument("--students", type=int, default=500)
+    args = parser.parse_args()
+
+    from app import create_app, init_db
+    from datagen import generate, PASSWORD
+
+    setup = create_app()
+    with setup.app_context():
+        init_db()
+        data = generate(args.students, 20, 5, 5, seed=7)
+
+    print(f"cold start ({args.cold_samples} fresh interpreters):")
+    cold_start(args.cold_samples)
+
+    print(f"{args.server}, {args.workers} workers, {args.concurrency} clients:")
+    started = time.perf_counter()
+    if args.server == "gunicorn":
+        port, stop = start_gunicorn(args.workers)
+    else:
+        port, stop = start_prefork(args.workers, args.init_per_worker)
+    try:
+        wait_ready(port)
+        print(f"  first response after {(time.perf_counter() - started) * 1000:.0f} ms")
+        load(port, data["student_emails"], PASSWORD, args.concurrency, args.seconds)
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
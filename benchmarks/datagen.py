@@ -0,0 +1,150 @@
+# Synthetic placement data, inserted in bulk.
+#
+#   python benchmarks/datagen.py --students 20000 --companies 200            # into DATABASE_URL / placement.db
+#
+# Rows go in with Core executemany in CHUNK sized batches (no ORM objects, no
+# per-row events), then the summary tables are rebuilt once. Everybody gets
+# the same password (PASSWORD) hashed once, so the accounts can log in.
+# The output is deterministic for a given --seed.
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Student, Company, Placement, Applications, APPLICATION_STATUSES
+import aggregates
+import eligibility
+import fragments
+
+PASSWORD = "bench-password"
+CHUNK = 5000
+
+FIRST = ["Aarav", "Vivaan", "Aditya", "Diya", "Ananya", "Ishaan", "Kavya", "Rohan", "Meera", "Arjun"]
+LAST = ["Sharma", "Verma", "Gupta", "Mehta", "Iyer", "Reddy", "Nair", "Singh", "Das", "Joshi"]
+BRANCHES = ["CSE", "ECE", "ME", "CE", "EE", "IT", "Chemical", "Biotech"]
+ROLES = ["Data Analyst", "Backend Developer", "Frontend Engineer", "ML Engineer", "DevOps", "QA Tester"]
+
+
+def _insert(conn, table, rows):
+    for i in range(0, len(rows), CHUNK):
+        conn.execute(insert(table), rows[i:i + CHUNK])
+
+
+def _next_id(conn, column):
+    return (conn.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def _sync_sequences(conn, columns):
+    # Explicit ids leave PostgreSQL's serial sequences behind, the next app insert would collide
+    if conn.dialect.name != "postgresql":
+        return
+    for column in columns:
+        conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{column.table.name}', '{column.name}'), "
+                          f"(SELECT max({column.name}) FROM {column.table.name}))"))
+
+
+def generate(students=1000, companies=50, drives_per_company=5, applications_per_student=5, seed=7):
+    # CALL INSIDE app.app_context(). Returns a dict with the ids the benchmarks need.
+    rnd = random.Random(seed)
+    hashed = generate_password_hash(PASSWORD)
+    now = datetime.now()
+    tag = f"{seed}-{int(time.time())}"                     # keeps emails unique across runs on one database
+
+    with db.engine.begin() as conn:
+        user_id = _next_id(conn, User.id)
+        student_id = _next_id(conn, Student.student_id)
+        company_id = _next_id(conn, Company.company_id)
+        drive_id = _next_id(conn, Placement.drive_id)
+
+        student_users = list(range(user_id, user_id + students))
+        company_users = list(range(user_id + students, user_id + students + companies))
+        _insert(conn, User.__table__,
+                [{"id": u, "email": f"student{i}-{tag}@bench.local", "password": hashed, "role": "Student"}
+                 for i, u in enumerate(student_users)] +
+                [{"id": u, "email": f"company{i}-{tag}@bench.local", "password": hashed, "role": "Company"}
+                 for i, u in enumerate(company_users)])
+
+        student_ids = list(range(student_id, student_id + students))
+        _insert(conn, Student.__table__, [
+            {"student_id": s, "user_id": u, "full_name": f"{rnd.choice(FIRST)} {rnd.choice(LAST)}",
+             "cgpa": round(rnd.uniform(5, 10), 2), "branch": rnd.choice(BRANCHES),
+             "resume_url": f"https://resumes.example/{s}.pdf"}
+            for s, u in zip(student_ids, student_users)
+        ])
+
+        company_ids = list(range(company_id, company_id + companies))
+        _insert(conn, Company.__table__, [
+            {"company_id": c, "user_id": u, "company_name": f"{rnd.choice(LAST)} Labs {c}", "hr_contact": "hr",
+             "website": f"https://c{c}.example", "approval_status": "Approved", "is_blacklisted": False}
+            for c, u in zip(company_ids, company_users)
+        ])
+
+        drives = []
+        for c in company_ids:
+            for _ in range(drives_per_company):
+                drives.append({
+                    "drive_id": drive_id + len(drives), "company_id": c, "job_title": rnd.choice(ROLES),
+                    "min_cgpa": rnd.choice([5, 6, 7, 8]), "deadline": now + timedelta(days=rnd.randint(1, 90)),
+                    "drive_status": "Approved", "job_description": f"{rnd.choice(ROLES)} role working on data pipelines",
+                })
+        _insert(conn, Placement.__table__, drives)
+
+        drive_ids = [d["drive_id"] for d in drives]
+        applications = []
+        per_student = min(applications_per_student, len(drive_ids))
+        for s in student_ids:
+            for d in rnd.sample(drive_ids, per_student):
+                applications.append({"student_id": s, "drive_id": d, "status": rnd.choice(APPLICATION_STATUSES),
+                                     "app_date": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 30))})
+        _insert(conn, Applications.__table__, applications)
+        _sync_sequences(conn, [User.id, Student.student_id, Company.company_id, Placement.drive_id])
+
+    # bulk inserts skip the ORM events
+    aggregates.rebuild()
+    eligibility.invalidate()
+    fragments.bump("drives", "applications", "students")
+
+    return {
+        "student_emails": [f"student{i}-{tag}@bench.local" for i in range(students)],
+        "company_emails": [f"company{i}-{tag}@bench.local" for i in range(companies)],
+        "student_ids": student_ids,
+        "company_ids": company_ids,
+        "drive_ids": drive_ids,
+        "applications": len(applications),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--drives-per-company", type=int, default=5)
+    parser.add_argument("--applications-per-student", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DEADLINE_SCHEDULER", "0")
+    os.environ.setdefault("JOB_WORKER_THREAD", "0")
+    from app import create_app, init_db
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        start = time.perf_counter()
+        data = generate(args.students, args.companies, args.drives_per_company, args.applications_per_student,
+                        args.seed)
+        print(f"{args.students} students, {args.companies} companies, {len(data['drive_ids'])} drives, "
+              f"{data['applications']} applications in {time.perf_counter() - start:.1f}s "
+              f"(password: {PASSWORD})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Stress test for application submission: thousands of concurrent applies,
+# many of them repeats of the same (student, drive) pair, from several processes
+# with several threads each.
+#
+#   python benchmarks/stress_apply.py --students 40 --drives 50 --repeat 3 --processes 4 --threads 8
+#
+# Checks afterwards that every eligible pair is stored exactly once, nothing
+# ineligible got in, no request failed and the statistics tables still agree.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "stress.db")
+os.environ.setdefault("DEADLINE_SCHEDULER", "0")
+os.environ.setdefault("JOB_WORKER_THREAD", "0")
+os.environ.setdefault("LOG_LEVEL", "ERROR")                # lock waits would show up as slow query warnings
+
+from sqlalchemy import func, select
+
+from app import create_app, init_db
+from models import db, Student, Placement, Applications
+from datagen import generate
+import aggregates
+
+app = create_app()
+with app.app_context():
+    init_db()
+
+
+def run_tasks(tasks):
+    # tasks: (user_id, drive_id, idempotency_key). Returns Counter of flash categories / http errors.
+    clients = {}
+    results = Counter()
+    for user_id, drive_id, key in tasks:
+        client = clients.get(user_id)
+        if client is None:
+            client = clients[user_id] = app.test_client()
+            with client.session_transaction() as session:  # logged in without hashing a password
+                session["user_id"] = user_id
+                session["role"] = "Student"
+        response = client.post(f"/apply/{drive_id}", data={"idempotency_key": key})
+        if response.status_code != 302:
+            results[f"http {response.status_code}"] += 1
+            continue
+        with client.session_transaction() as session:
+            for category, message in session.pop("_flashes", []):
+                results[message] += 1
+    return results
+
+
+def run_process(tasks, threads):
+    chunks = [tasks[i::threads] for i in range(threads)]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return sum(pool.map(run_tasks, chunks), Counter())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--drives", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="submissions per (student, drive) pair")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with app.app_context():
+        data = generate(args.students, 1, args.drives, 0)
+        user_ids = dict(db.session.execute(
+            select(Student.student_id, Student.user_id).where(Student.student_id.in_(data["student_ids"]))).all())
+        expected = db.session.execute(
+            select(func.count()).select_from(Student).join(Placement, Placement.min_cgpa <= Student.cgpa)
+            .where(Student.student_id.in_(data["student_ids"]), Placement.drive_id.in_(data["drive_ids"]))
+        ).scalar()
+        db.engine.dispose()                                # never share pooled connections with forked workers
+
+    # every pair is sent `repeat` times: twice with the same key (a double click), the rest with fresh keys
+    rnd = random.Random(1)
+    tasks = []
+    for student_id in data["student_ids"]:
+        for drive_id in data["drive_ids"]:
+            key = f"{student_id}-{drive_id}"
+            for r in range(args.repeat):
+                tasks.append((user_ids[student_id], drive_id, key if r < 2 else f"{key}-{r}"))
+    rnd.shuffle(tasks)
+
+    start = time.perf_counter()
+    chunks = [tasks[i::args.processes] for i in range(args.processes)]
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        results = sum(pool.map(run_process, chunks, [args.threads] * args.processes), Counter())
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        stored = db.session.execute(
+            select(func.count(), func.count(func.distinct(Applications.student_id * 1000003 + Applications.drive_id)))
+            .where(Applications.drive_id.in_(data["drive_ids"]))
+        ).one()
+        problems = aggregates.check()
+
+    print(f"{len(tasks)} applies from {args.processes} processes x {args.threads} threads "
+          f"in {elapsed:.1f}s ({len(tasks) / elapsed:.0f}/s)")
+    for outcome, n in results.most_common():
+        print(f"  {n:>6}  {outcome}")
+    print(f"eligible pairs: {expected}  stored: {stored[0]}  distinct: {stored[1]}")
+    print(f"statistics: {'consistent' if not problems else problems}")
+
+    ok = stored[0] == stored[1] == expected and not problems and not any(k.startswith("http") for k in results)
+    print("OK" if ok else "FAILED")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
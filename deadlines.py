@@ -0,0 +1,152 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import update
+
+from models import db, Placement, DRIVE_OPEN, DRIVE_CLOSED, on_commit
+import eligibility
+import fragments
+
+
+# Drive lifecycle: an open drive becomes "Closed" once its deadline passes.
+# A background thread keeps a heap of (deadline, drive_id) for the open drives
+# and sleeps until the earliest one. New or edited drives are pushed onto the
+# heap after commit. Drives posted by other worker processes are picked up by
+# reloading the heap every RELOAD_INTERVAL seconds. Closing is a single guarded
+# UPDATE, so several processes doing it at once is harmless.
+#
+# Without the thread (DEADLINE_SCHEDULER=0), run `flask close-expired-drives`
+# from cron. The dashboards filter on the deadline anyway, so a late close is
+# only visible in the status column.
+
+RELOAD_INTERVAL = 300                                      # seconds
+
+
+def close_expired(drive_ids=None):
+    # Returns the number of drives closed
+    stmt = (
+        update(Placement)
+        .where(Placement.drive_status == DRIVE_OPEN, Placement.deadline <= datetime.now())
+        .values(drive_status=DRIVE_CLOSED, row_version=Placement.row_version + 1)
+    )
+    if drive_ids is not None:
+        stmt = stmt.where(Placement.drive_id.in_(drive_ids))
+
+    closed = db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+    db.session.commit()
+
+    # Bulk UPDATE skips the ORM events
+    if closed:
+        eligibility.invalidate("drives")
+        fragments.bump("drives")
+    return closed
+
+
+class DeadlineScheduler:
+    def __init__(self, app, reload_interval=RELOAD_INTERVAL):
+        self.app = app
+        self.reload_interval = reload_interval
+        self._heap = []                                    # (deadline, drive_id)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="deadline-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def schedule(self, deadline, drive_id):
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, drive_id))
+            if self._heap[0] == (deadline, drive_id):      # new earliest deadline, wake up earlier
+                self._cond.notify()
+
+    def _load(self):
+        rows = db.session.query(Placement.deadline, Placement.drive_id).filter(
+            Placement.drive_status == DRIVE_OPEN).all()
+        heap = [(row.deadline, row.drive_id) for row in rows]
+        heapq.heapify(heap)
+        with self._cond:
+            self._heap = heap
+
+    def _due(self, next_reload):
+        # Waits until a deadline passes or the heap needs a reload, returns the expired drive ids
+        with self._cond:
+            while not self._stopped:
+                now = datetime.now()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[1])
+                if due:
+                    return due
+
+                wait = next_reload - time.monotonic()
+                if wait <= 0:
+                    return []
+                if self._heap:
+                    wait = min(wait, (self._heap[0][0] - now).total_seconds())
+                self._cond.wait(max(wait, 0.01))
+        return None
+
+    def _run(self):
+        next_reload = 0
+        while True:
+            try:
+                if time.monotonic() >= next_reload:
+                    with self.app.app_context():
+                        self._load()
+                    next_reload = time.monotonic() + self.reload_interval
+
+                due = self._due(next_reload)
+                if due is None:
+                    return
+                if due:
+                    with self.app.app_context():
+                        closed = close_expired(due)
+                    if closed:
+                        self.app.logger.info("closed %d expired drive(s)", closed)
+            except Exception:                              # e.g. database locked, try again shortly
+                self.app.logger.exception("deadline scheduler failed")
+                next_reload = time.monotonic() + 5
+                time.sleep(5)
+
+
+scheduler = None
+
+
+def start_scheduler(app):
+    global scheduler
+    scheduler = DeadlineScheduler(app)
+    scheduler.start()
+    return scheduler
+
+
+# New and edited drives reach the heap once they are committed
+
+def _new_deadline(mapper, connection, target):
+    return [(target.deadline, target.drive_id)] if target.drive_status == DRIVE_OPEN else []
+
+
+def _schedule_all(deadlines):
+    if scheduler is not None:
+        for deadline, drive_id in deadlines:
+            scheduler.schedule(deadline, drive_id)
+
+
+on_commit((Placement,), "new_deadlines", _schedule_all, _new_deadline, events=("after_insert", "after_update"))
+
+
+@click.command("close-expired-drives")
+@with_appcontext
+def close_expired_command():
+    """Close every open drive whose deadline has passed."""
+    click.echo(f"{close_expired()} drive(s) closed.")
@@ -0,0 +1,179 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from models import db, Student, Company, Placement, DRIVE_OPEN, on_commit
+
+try:
+    import numpy as np                                     # OPTIONAL, ONLY USED FOR BULK / BATCH MATCHING
+except ImportError:
+    np = None
+
+
+# Eligibility matching engine.
+# Open drives (approved, deadline not passed, company not blacklisted) are kept
+# sorted by min_cgpa and students sorted by cgpa, so:
+#   eligible drives for a student  -> one bisect over the drive cgpas
+#   eligible students for a drive  -> one searchsorted over the student cgpas
+# Each index is built once per process and rebuilt after a commit that changed
+# its source rows, when the earliest open deadline passes, or after MAX_AGE seconds.
+
+MAX_AGE = 60                                               # seconds, bounds staleness across worker processes
+
+
+class DriveIndex:
+    def __init__(self, drives):
+        # drives: rows of (drive_id, min_cgpa, deadline)
+        drives = sorted(drives, key=lambda d: (d.min_cgpa, d.drive_id))
+
+        self.drive_ids = [d.drive_id for d in drives]
+        self.drive_cgpas = [d.min_cgpa for d in drives]
+        self.min_cgpa = dict(zip(self.drive_ids, self.drive_cgpas))
+        self.next_expiry = min((d.deadline for d in drives), default=None)
+        self.built_at = time.monotonic()
+
+    def is_stale(self):
+        if time.monotonic() - self.built_at > MAX_AGE:
+            return True
+        return self.next_expiry is not None and datetime.now() >= self.next_expiry
+
+    def drives_for(self, cgpa):
+        # every open drive with min_cgpa <= cgpa
+        return self.drive_ids[:bisect_right(self.drive_cgpas, cgpa)]
+
+    def is_eligible(self, cgpa, drive_id):
+        return drive_id in self.min_cgpa and self.min_cgpa[drive_id] <= cgpa
+
+    def drive_counts_for(self, cgpas):
+        # number of eligible drives for each cgpa in a batch (e.g. every student at once)
+        if np is not None:
+            return np.searchsorted(np.array(self.drive_cgpas, dtype=np.float64),
+                                   np.asarray(cgpas, dtype=np.float64), side="right").tolist()
+
+        return [bisect_right(self.drive_cgpas, c) for c in cgpas]
+
+
+class StudentIndex:
+    def __init__(self, students):
+        # students: rows of (student_id, cgpa)
+        students = sorted(students, key=lambda s: (s.cgpa, s.student_id))
+        self.built_at = time.monotonic()
+
+        if np is not None:
+            self.student_ids = np.array([s.student_id for s in students], dtype=np.int64)
+            self.student_cgpas = np.array([s.cgpa for s in students], dtype=np.float64)
+        else:
+            self.student_ids = [s.student_id for s in students]
+            self.student_cgpas = [s.cgpa for s in students]
+
+    def is_stale(self):
+        return time.monotonic() - self.built_at > MAX_AGE
+
+    def students_for(self, min_cgpa):
+        # every student with cgpa >= min_cgpa
+        if np is not None:
+            start = int(np.searchsorted(self.student_cgpas, min_cgpa, side="left"))
+            return self.student_ids[start:].tolist()
+
+        return self.student_ids[bisect_left(self.student_cgpas, min_cgpa):]
+
+    def eligible_counts_for(self, min_cgpas):
+        # number of eligible students for each min_cgpa in a batch, in one vectorized call
+        total = len(self.student_cgpas)
+        if np is not None:
+            starts = np.searchsorted(self.student_cgpas, np.asarray(min_cgpas, dtype=np.float64), side="left")
+            return (total - starts).tolist()
+
+        return [total - bisect_left(self.student_cgpas, c) for c in min_cgpas]
+
+    def eligible_counts(self, drive_index):
+        # drive_id -> number of eligible students, for every open drive
+        return dict(zip(drive_index.drive_ids, self.eligible_counts_for(drive_index.drive_cgpas)))
+
+
+def open_drives_for_matching():
+    return (
+        db.session.query(Placement.drive_id, Placement.min_cgpa, Placement.deadline)
+        .join(Company, Placement.company_id == Company.company_id)
+        .filter(
+            Company.is_blacklisted == False,
+            Placement.drive_status == DRIVE_OPEN,
+            Placement.deadline > datetime.now(),
+        )
+        .all()
+    )
+
+
+def _build_drives():
+    return DriveIndex(open_drives_for_matching())
+
+
+def _build_students():
+    return StudentIndex(db.session.query(Student.student_id, Student.cgpa).all())
+
+
+_lock = threading.Lock()
+_cache = {}                                                # (kind, engine url) -> index
+_dirty = set()
+_builders = {"drives": _build_drives, "students": _build_students}
+
+
+def _get(kind):
+    key = (kind, str(db.engine.url))
+    index = _cache.get(key)
+
+    if index is None or key in _dirty or index.is_stale():
+        with _lock:
+            index = _cache.get(key)
+            if index is None or key in _dirty or index.is_stale():
+                _dirty.discard(key)
+                index = _builders[kind]()
+                _cache[key] = index
+
+    return index
+
+
+def drive_index():
+    return _get("drives")
+
+
+def student_index():
+    return _get("students")
+
+
+def eligible_drive_ids(cgpa):
+    return drive_index().drives_for(cgpa)
+
+
+def eligible_student_ids(drive_id):
+    min_cgpa = drive_index().min_cgpa.get(drive_id)
+    if min_cgpa is None:                                   # closed, expired or blacklisted drive
+        return []
+
+    return student_index().students_for(min_cgpa)
+
+
+def eligible_student_count(drive_id):
+    min_cgpa = drive_index().min_cgpa.get(drive_id)
+    if min_cgpa is None:
+        return 0
+
+    return student_index().eligible_counts_for([min_cgpa])[0]
+
+
+def invalidate(kind=None):
+    _dirty.update(key for key in _cache if kind is None or key[0] == kind)
+
+
+# Invalidate only once the change is committed
+_WATCHED = {Placement: "drives", Company: "drives", Student: "students"}
+
+
+def _invalidate_all(kinds):
+    for kind in kinds:
+        invalidate(kind)
+
+
+on_commit(_WATCHED, "eligibility_dirty", _invalidate_all,
+          lambda mapper, connection, target: [_WATCHED[mapper.class_]])
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+
+from models import db, Student, Company, Placement, Applications
+
+
+# Streaming CSV / NDJSON exports.
+# Rows are read through a server-side cursor in batches of YIELD_PER and written
+# to the response by a generator, so memory stays flat however many applications
+# there are and the first bytes go out before the query has finished.
+
+YIELD_PER = 1000
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+REPORT_COLUMNS = [
+    Applications.app_id,
+    Applications.app_date,
+    Applications.status,
+    Student.student_id,
+    Student.full_name,
+    Student.branch,
+    Student.cgpa,
+    Placement.drive_id,
+    Placement.job_title,
+    Company.company_id,
+    Company.company_name,
+]
+
+
+def placement_report(drive_id=None, company_id=None):
+    stmt = (
+        select(*REPORT_COLUMNS)
+        .join(Student, Applications.student_id == Student.student_id)
+        .join(Placement, Applications.drive_id == Placement.drive_id)
+        .join(Company, Placement.company_id == Company.company_id)
+    )
+    if drive_id is not None:
+        stmt = stmt.where(Applications.drive_id == drive_id)
+    if company_id is not None:
+        stmt = stmt.where(Placement.company_id == company_id)
+
+    return stmt.order_by(Applications.app_id)
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _rows(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    for batch in result.partitions():
+        yield batch
+
+
+def generate_csv(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.key for c in REPORT_COLUMNS])
+
+    for batch in _rows(stmt):
+        writer.writerows([_value(v) for v in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def generate_ndjson(stmt):
+    keys = [c.key for c in REPORT_COLUMNS]
+
+    for batch in _rows(stmt):
+        yield "".join(json.dumps(dict(zip(keys, map(_value, row)))) + "\n" for row in batch)
+
+
+def export_response(stmt, fmt, filename):
+    generate = generate_csv if fmt == "csv" else generate_ndjson
+    response = Response(stream_with_context(generate(stmt)), mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+
+    return response
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from flask import current_app, request
+from markupsafe import Markup
+from models import Student, Company, Placement, Applications, on_commit
+
+
+# Cached HTML fragments for the dashboards.
+# A fragment is stored under a key that contains the current version of every
+# table group it was rendered from ("drives", "applications", "students").
+# Committing a change to one of those tables bumps its version, so old entries
+# are simply never asked for again and fall out of the LRU / expire by TTL.
+#
+#   html = cached_fragment("admin_drives", ["drives"],
+#                          lambda: render_template("_admin_drives.html", drives=...))
+#
+# FRAGMENT_CACHE picks the backend: "lru" (per process, default), "redis"
+# (shared, needs the `redis` package and any Redis compatible server at
+# FRAGMENT_CACHE_URL) or "none". With "lru" every worker process has its own
+# versions, so a change made in another process is seen after at most
+# FRAGMENT_CACHE_TTL seconds.
+
+stats = Counter()                                          # (fragment name, "hit" / "miss" / "error") -> count
+
+
+class LRUBackend:
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()                        # key -> (expires at, html)
+        self._versions = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def versions(self, namespaces):
+        with self._lock:
+            return [self._versions[n] for n in namespaces]
+
+    def bump(self, namespace):
+        with self._lock:
+            self._versions[namespace] += 1
+
+
+class RedisBackend:
+    def __init__(self, url, ttl, prefix="portal:fragment:"):
+        import redis                                       # OPTIONAL, ONLY FOR FRAGMENT_CACHE=redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value.encode(), ex=self.ttl)
+
+    def versions(self, namespaces):
+        values = self.client.mget([self.prefix + "v:" + n for n in namespaces])
+        return [int(v or 0) for v in values]
+
+    def bump(self, namespace):
+        self.client.incr(self.prefix + "v:" + namespace)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    # None when caching is switched off, or for an app not built by create_app() (scripts, benchmarks)
+    global _backend
+    config = current_app.config
+    kind = config.get("FRAGMENT_CACHE", "none")
+    if kind == "none":
+        return None
+
+    with _backend_lock:
+        if _backend is None:
+            if kind == "redis":
+                _backend = RedisBackend(config["FRAGMENT_CACHE_URL"], config["FRAGMENT_CACHE_TTL"])
+            else:
+                _backend = LRUBackend(config["FRAGMENT_CACHE_TTL"], config["FRAGMENT_CACHE_SIZE"])
+    return _backend
+
+
+def digest(values):
+    # short stable key part for a (possibly long) collection of ids
+    return hashlib.blake2b(",".join(map(str, sorted(values))).encode(), digest_size=12).hexdigest()
+
+
+def cached_fragment(name, depends_on, render, *key_parts):
+    # `render` is only called on a miss. The key always contains the request path and
+    # query string, because fragments embed pager links built from them.
+    cache = backend()
+    if cache is None:
+        return Markup(render())
+
+    try:
+        versions = cache.versions(depends_on)
+        key = ":".join([name, *map(str, versions), request.full_path, *map(str, key_parts)])
+        html = cache.get(key)
+    except Exception:                                      # a broken cache must not break the page
+        current_app.logger.exception("fragment cache unavailable")
+        stats[name, "error"] += 1
+        return Markup(render())
+
+    if html is not None:
+        stats[name, "hit"] += 1
+        return Markup(html)
+
+    stats[name, "miss"] += 1
+    html = render()
+    try:
+        cache.set(key, html)
+    except Exception:
+        current_app.logger.exception("fragment cache unavailable")
+    return Markup(html)
+
+
+def bump(*namespaces):                                     # FOR BULK SQL THAT SKIPS THE ORM EVENTS
+    cache = backend()
+    if cache is None:
+        return
+    for namespace in namespaces:
+        try:
+            cache.bump(namespace)
+        except Exception:
+            current_app.logger.exception("fragment cache unavailable")
+
+
+def hit_ratios():
+    # {fragment name: (hits, misses, hit ratio)} for the admin statistics page
+    names = sorted({name for name, _ in stats})
+    ratios = {}
+    for name in names:
+        hits, misses = stats[name, "hit"], stats[name, "miss"]
+        ratios[name] = (hits, misses, hits / (hits + misses) if hits + misses else 0.0)
+    return ratios
+
+
+# Bump the versions only once the change is committed
+_WATCHED = {Placement: "drives", Company: "drives", Applications: "applications", Student: "students"}
+
+on_commit(_WATCHED, "fragments_dirty", lambda namespaces: bump(*namespaces),
+          lambda mapper, connection, target: [_WATCHED[mapper.class_]])
@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+
+
+# gunicorn -c gunicorn.conf.py wsgi:app
+# Every setting can be overridden from the environment.
+#
+# The web workers run neither the deadline scheduler nor the job worker thread,
+# otherwise every worker would start its own. Run them once next to gunicorn:
+#   flask --app wsgi jobs-worker                               # one process, deletes and notifications
+#   * * * * * flask --app wsgi close-expired-drives            # cron, closes drives past their deadline
+# Set DEADLINE_SCHEDULER=1 / JOB_WORKER_THREAD=1 to get them back inside the workers.
+#
+# Each worker also forks its own password hashing pool, so by default the CPUs
+# are split between the workers instead of every worker taking min(4, CPUs).
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+os.environ.setdefault("DEADLINE_SCHEDULER", "0")
+os.environ.setdefault("JOB_WORKER_THREAD", "0")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+threads = int(os.environ.get("WEB_THREADS", 1))           # > 1 switches to the gthread worker
+preload_app = True                                         # import and build the app once, then fork
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 5000))   # recycle workers now and then
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get("ACCESS_LOG") or None
+
+
+def post_fork(server, worker):
+    # Nothing should have connected before the fork, but never share a pooled connection with the master
+    from wsgi import app
+    from models import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,270 @@
+import csv
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Student, Company
+import eligibility
+import aggregates
+import fragments
+from passwords import hash_method
+
+
+# Bulk onboarding of students / companies from CSV or JSON.
+#
+#   flask --app app import-students batch_2026.csv
+#   flask --app app import-companies companies.jsonl --chunk-size 500 --errors bad_rows.csv
+#
+# Rows are streamed in chunks. Each chunk is validated, its passwords are hashed
+# in a process pool, and it is inserted with executemany in its own transaction.
+# A bad row is reported and skipped, it never aborts the rest of the batch.
+
+DEFAULT_CHUNK_SIZE = 1000
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+STUDENT_FIELDS = ["email", "password", "full_name", "cgpa", "branch", "resume_url"]
+COMPANY_FIELDS = ["email", "password", "company_name", "website", "hr_contact"]
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.errors = []                                   # (line number, email, message)
+        self.started = time.perf_counter()
+
+    @property
+    def seen(self):
+        return self.inserted + len(self.errors)
+
+    def rows_per_sec(self):
+        elapsed = time.perf_counter() - self.started
+        return self.seen / elapsed if elapsed else 0.0
+
+
+def read_rows(path):
+    # Yields (line number, row). CSV and JSON lines are streamed, a .json array is loaded whole.
+    # A JSON line that does not parse is yielded as its ValueError, _import_chunk reports it.
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+    elif path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, ValueError(f"invalid JSON: {e}")
+    elif path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            for line_no, row in enumerate(json.load(f), start=1):
+                yield line_no, row
+    else:
+        raise click.BadParameter("file must be .csv, .json, .jsonl or .ndjson")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _clean(row, fields):
+    return {f: str(row.get(f) or "").strip() for f in fields}
+
+
+def validate_student(row):
+    data = _clean(row, STUDENT_FIELDS)
+    for field in ("email", "password", "full_name", "cgpa", "branch"):
+        if not data[field]:
+            raise ValueError(f"{field} is required")
+    if not EMAIL_RE.match(data["email"]):
+        raise ValueError("invalid email")
+    try:
+        data["cgpa"] = float(data["cgpa"])
+    except ValueError:
+        raise ValueError("cgpa must be a number")
+    if not 0 <= data["cgpa"] <= 10:
+        raise ValueError("cgpa must be between 0 and 10")
+    data["resume_url"] = data["resume_url"] or None
+
+    return data
+
+
+def validate_company(row):
+    row = dict(row)
+    row.setdefault("email", row.get("company_email"))      # same field name as the register form
+    data = _clean(row, COMPANY_FIELDS)
+    for field in COMPANY_FIELDS:
+        if not data[field]:
+            raise ValueError(f"{field} is required")
+    if not EMAIL_RE.match(data["email"]):
+        raise ValueError("invalid email")
+
+    return data
+
+
+def _profile_student(user_id, data):
+    return {"user_id": user_id, "full_name": data["full_name"], "cgpa": data["cgpa"],
+            "branch": data["branch"], "resume_url": data["resume_url"]}
+
+
+def _profile_company(user_id, data):
+    return {"user_id": user_id, "company_name": data["company_name"], "website": data["website"],
+            "hr_contact": data["hr_contact"]}
+
+
+KINDS = {
+    # role:      (validator,        profile model, profile builder)
+    "Student": (validate_student, Student, _profile_student),
+    "Company": (validate_company, Company, _profile_company),
+}
+
+
+def _insert_rows(rows, role, profile_model, build_profile):
+    # rows: list of (line number, data with hashed password)
+    users = db.session.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [{"email": d["email"], "password": d["password"], "role": role} for _, d in rows],
+    ).scalars().all()
+    db.session.execute(
+        insert(profile_model),
+        [build_profile(user_id, d) for user_id, (_, d) in zip(users, rows)],
+    )
+    if role == "Student":                                  # executemany skips the ORM events
+        aggregates.students_added(db.session.connection(), [d["branch"] for _, d in rows])
+
+
+def _import_chunk(chunk, role, pool, report):
+    validate, profile_model, build_profile = KINDS[role]
+
+    valid = []
+    seen_emails = set()
+    for line_no, row in chunk:
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            if not isinstance(row, dict):
+                raise ValueError("row must be a JSON object")
+            data = validate(row)
+            if data["email"].lower() in seen_emails:
+                raise ValueError("duplicate email in this file")
+            seen_emails.add(data["email"].lower())
+            valid.append((line_no, data))
+        except ValueError as e:
+            email = row.get("email", "") if isinstance(row, dict) else ""
+            report.errors.append((line_no, str(email), str(e)))
+
+    if not valid:
+        return
+
+    # One query per chunk for emails that are already registered
+    emails = [d["email"] for _, d in valid]
+    existing = set(db.session.execute(db.select(User.email).where(User.email.in_(emails))).scalars())
+    rows = []
+    for line_no, data in valid:
+        if data["email"] in existing:
+            report.errors.append((line_no, data["email"], "email is already registered"))
+        else:
+            rows.append((line_no, data))
+
+    hashes = pool.map(partial(generate_password_hash, method=hash_method()), [d["password"] for _, d in rows],
+                      chunksize=32)
+    for (_, data), hashed in zip(rows, hashes):
+        data["password"] = hashed
+
+    try:
+        _insert_rows(rows, role, profile_model, build_profile)
+        db.session.commit()
+        report.inserted += len(rows)
+    except IntegrityError:
+        # Someone registered one of these emails meanwhile, retry row by row to find it
+        db.session.rollback()
+        for line_no, data in rows:
+            try:
+                _insert_rows([(line_no, data)], role, profile_model, build_profile)
+                db.session.commit()
+                report.inserted += 1
+            except IntegrityError as e:
+                db.session.rollback()
+                report.errors.append((line_no, data["email"], str(e.orig)))
+
+
+def import_file(path, role, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, progress=None):
+    report = ImportReport()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunked(read_rows(path), chunk_size):
+            _import_chunk(chunk, role, pool, report)
+            if progress:
+                progress(report)
+
+    # Core inserts skip ORM events, so tell the matching engine and the page cache explicitly
+    eligibility.invalidate("students" if role == "Student" else "drives")
+    fragments.bump("students" if role == "Student" else "drives")
+
+    return report
+
+
+def _run(path, role, chunk_size, workers, errors_path):
+    def progress(report):
+        click.echo(f"  {report.seen} rows, {report.inserted} inserted, "
+                   f"{len(report.errors)} errors, {report.rows_per_sec():.0f} rows/sec")
+
+    report = import_file(path, role, chunk_size, workers, progress)
+    click.echo(f"Done: {report.inserted} {role.lower()} accounts created, {len(report.errors)} rows rejected "
+               f"({report.rows_per_sec():.0f} rows/sec)")
+
+    report.errors.sort()
+    if report.errors and errors_path:
+        with open(errors_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["line", "email", "error"])
+            writer.writerows(report.errors)
+        click.echo(f"Rejected rows written to {errors_path}")
+    else:
+        for line_no, email, message in report.errors[:20]:
+            click.echo(f"  line {line_no} ({email}): {message}")
+
+
+_options = [
+    click.argument("path", type=click.Path(exists=True, dir_okay=False)),
+    click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True, help="Rows per transaction."),
+    click.option("--workers", default=None, type=int, help="Password hashing processes (default: CPU count)."),
+    click.option("--errors", "errors_path", default=None, help="Write rejected rows to this CSV file."),
+]
+
+
+def _with_options(fn):
+    for option in reversed(_options):
+        fn = option(fn)
+    return fn
+
+
+@click.command("import-students")
+@_with_options
+@with_appcontext
+def import_students_command(path, chunk_size, workers, errors_path):
+    """Bulk create student accounts from a CSV / JSON file."""
+    _run(path, "Student", chunk_size, workers, errors_path)
+
+
+@click.command("import-companies")
+@_with_options
+@with_appcontext
+def import_companies_command(path, chunk_size, workers, errors_path):
+    """Bulk create company accounts from a CSV / JSON file."""
+    _run(path, "Company", chunk_size, workers, errors_path)
@@ -0,0 +1,250 @@
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from flask import current_app, g, has_app_context, request, session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import fragments
+
+
+# Request and SQL instrumentation.
+# For every request we record the latency, the number of SQL statements and
+# the time spent in the database (SQLAlchemy cursor events). Two warnings are
+# logged on top of that:
+#   slow query  -> one statement took longer than METRICS_SLOW_QUERY_MS
+#   N+1         -> the same statement ran METRICS_N_PLUS_ONE times in one request
+# GET /admin/metrics serves everything in the Prometheus text format.
+#
+# With PROFILE_DIR set, a sampling profiler records selected requests: a share
+# (PROFILE_RATE) of the PROFILE_ENDPOINTS, or any page an admin opens with
+# ?profile=1. Output is one "folded stacks" file per request, ready for
+# flamegraph.pl or speedscope.
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]      # seconds
+STATEMENT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]                               # statements per request
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)             # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip([*self.buckets, "+Inf"], self.counts):
+            total += n
+            yield bound, total
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}                                  # (endpoint, method) -> Histogram
+        self.statements = {}                               # endpoint -> Histogram
+        self.requests = Counter()                          # (endpoint, method, status)
+        self.db_seconds = Counter()                        # endpoint
+        self.slow_queries = Counter()                      # endpoint
+        self.n_plus_one = Counter()                        # endpoint
+
+    def record(self, endpoint, method, status, seconds, stats):
+        with self._lock:
+            self.latency.setdefault((endpoint, method), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.statements.setdefault(endpoint, Histogram(STATEMENT_BUCKETS)).observe(stats.statements)
+            self.requests[endpoint, method, status] += 1
+            self.db_seconds[endpoint] += stats.db_seconds
+            self.slow_queries[endpoint] += stats.slow
+            if stats.repeated:
+                self.n_plus_one[endpoint] += 1
+
+
+metrics = Metrics()
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slow = 0
+        self.shapes = Counter()                            # statement text -> times run
+        self.repeated = None                               # first statement that looked like N+1
+        self.profiler = None
+
+
+# ---- SQL ----
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the execution context, so a statement that fails leaves nothing behind on the connection
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    stats = g.get("request_stats") if has_app_context() else None
+    if stats is None:                                      # CLI, scheduler thread, startup
+        return
+
+    config = current_app.config
+    stats.statements += 1
+    stats.db_seconds += elapsed
+
+    if elapsed * 1000 >= config["METRICS_SLOW_QUERY_MS"]:
+        stats.slow += 1
+        current_app.logger.warning("slow query (%.0f ms) on %s: %s", elapsed * 1000, request.endpoint,
+                                   " ".join(statement.split())[:500])
+
+    stats.shapes[statement] += 1
+    if stats.repeated is None and stats.shapes[statement] == config["METRICS_N_PLUS_ONE"]:
+        stats.repeated = statement
+        current_app.logger.warning("possible N+1 on %s, statement ran %d times: %s", request.endpoint,
+                                   stats.shapes[statement], " ".join(statement.split())[:500])
+
+
+# ---- requests ----
+
+def _wants_profile():
+    config = current_app.config
+    if not config["PROFILE_DIR"]:
+        return False
+    if request.args.get("profile") == "1" and session.get("role") == "Admin":
+        return True
+    endpoints = config["PROFILE_ENDPOINTS"]
+    return (not endpoints or request.endpoint in endpoints) and random.random() < config["PROFILE_RATE"]
+
+
+def _before_request():
+    g.request_stats = stats = RequestStats()
+    if _wants_profile():
+        stats.profiler = SamplingProfiler(threading.get_ident(), current_app.config["PROFILE_INTERVAL_MS"] / 1000)
+        stats.profiler.start()
+
+
+def _finish(status):
+    stats = g.pop("request_stats", None)
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - stats.started
+    endpoint = request.endpoint or "unknown"
+    metrics.record(endpoint, request.method, status, elapsed, stats)
+
+    if stats.profiler is not None:
+        stats.profiler.stop()
+        path = stats.profiler.write(current_app.config["PROFILE_DIR"], endpoint)
+        current_app.logger.info("profile of %s (%.0f ms) written to %s", request.path, elapsed * 1000, path)
+
+
+def _after_request(response):
+    _finish(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    if exc is not None:                                    # after_request never ran
+        _finish(500)
+
+
+def init_app(app):
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+# ---- Prometheus text format ----
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _histogram(lines, name, help_text, histograms, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+        for bound, total in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {total}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+
+def _counter(lines, name, help_text, counter, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(counter.items()):
+        labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+        lines.append(f"{name}{_labels(**labels)} {value:g}")
+
+
+def prometheus_text():
+    lines = []
+    with metrics._lock:
+        _histogram(lines, "portal_request_duration_seconds", "Request latency.",
+                   metrics.latency, ["endpoint", "method"])
+        _histogram(lines, "portal_sql_statements_per_request", "SQL statements run by one request.",
+                   metrics.statements, ["endpoint"])
+        _counter(lines, "portal_requests_total", "Requests served.",
+                 metrics.requests, ["endpoint", "method", "status"])
+        _counter(lines, "portal_sql_seconds_total", "Time spent in SQL statements.",
+                 metrics.db_seconds, ["endpoint"])
+        _counter(lines, "portal_sql_slow_queries_total", "Statements slower than METRICS_SLOW_QUERY_MS.",
+                 metrics.slow_queries, ["endpoint"])
+        _counter(lines, "portal_n_plus_one_total", "Requests that repeated one statement METRICS_N_PLUS_ONE times.",
+                 metrics.n_plus_one, ["endpoint"])
+    _counter(lines, "portal_fragment_cache_total", "Dashboard fragment cache lookups.",
+             Counter(fragments.stats), ["fragment", "result"])
+
+    return "\n".join(lines) + "\n"
+
+
+# ---- sampling profiler ----
+
+class SamplingProfiler:
+    # Looks at the stack of one thread every `interval` seconds from a helper thread
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()                           # folded stack -> samples
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"{name}-{stamp}-{os.getpid()}-{random.randrange(1 << 16):04x}.folded")
+        with open(path, "w") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        return path
@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, select, update
+
+from models import db, Job, Company, Placement, Applications, DriveStats, CompanyStats
+import aggregates
+import eligibility
+import fragments
+import notifications
+from auth import identity_cache
+
+
+# A small job queue in the `jobs` table.
+# enqueue() adds a row in the caller's transaction, so a job exists only if the
+# change that asked for it was committed. A worker claims the oldest due job with
+# one UPDATE ... RETURNING, runs its handler and marks it done. A failed job is
+# retried with exponential backoff, up to MAX_ATTEMPTS. Between jobs the worker
+# sends pending notifications (notifications.py). Handlers must be safe to run
+# again after a crash half way.
+#
+# Run the worker in its own process with `flask jobs-worker`, or let the web
+# process start a worker thread (JOB_WORKER_THREAD=1, the default).
+
+MAX_ATTEMPTS = 5
+STALE_AFTER = timedelta(minutes=30)                        # "running" this long means its worker died
+DELETE_CHUNK = 1000
+
+HANDLERS = {}
+
+
+def job(kind):
+    def register(handler):
+        HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def enqueue(kind, **payload):
+    # Runs once the caller commits
+    db.session.add(Job(kind=kind, payload=json.dumps(payload), run_after=datetime.now()))
+
+
+def claim():
+    now = datetime.now()
+    due = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_after <= now)
+        .limit(1)
+    )
+    if db.session.execute(due).first() is None:           # idle: a plain read, no write lock every poll
+        return None
+
+    next_job = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_after <= now)
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)                 # PostgreSQL: workers never wait for each other
+        .scalar_subquery()
+    )
+    row = db.session.execute(
+        update(Job)
+        .where(Job.id == next_job, Job.status == "queued")
+        .values(status="running", started_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts),
+        execution_options={"synchronize_session": False},
+    ).first()
+    db.session.commit()
+    return row
+
+
+def _finish(job_id, **values):
+    db.session.execute(update(Job).where(Job.id == job_id).values(**values),
+                       execution_options={"synchronize_session": False})
+    db.session.commit()
+
+
+def run_one():
+    # Runs the next due job, returns False when there was none
+    row = claim()
+    if row is None:
+        return False
+
+    try:
+        HANDLERS[row.kind](**json.loads(row.payload))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("job %s (%s) failed, attempt %d", row.id, row.kind, row.attempts)
+        if row.attempts >= MAX_ATTEMPTS:
+            _finish(row.id, status="failed", error=str(e), finished_at=datetime.now())
+        else:
+            _finish(row.id, status="queued", error=str(e),
+                    run_after=datetime.now() + timedelta(seconds=2 ** row.attempts))
+    else:
+        _finish(row.id, status="done", error=None, finished_at=datetime.now())
+    return True
+
+
+def requeue_stale():
+    stale = db.session.execute(
+        update(Job)
+        .where(Job.status == "running", Job.started_at < datetime.now() - STALE_AFTER)
+        .values(status="queued"),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.session.commit()
+    return stale
+
+
+def work(app, stop=None, poll_interval=1.0):
+    # Worker loop: jobs first, then one batch of notifications, sleep when idle
+    with app.app_context():
+        requeue_stale()
+
+    while stop is None or not stop.is_set():
+        try:
+            with app.app_context():
+                busy = run_one() or notifications.dispatch() > 0
+        except Exception:                                  # e.g. database locked, SMTP down
+            app.logger.exception("job worker failed")
+            busy = False
+        if not busy:
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+
+def start_worker(app):
+    stop = threading.Event()
+    thread = threading.Thread(target=work, args=(app, stop), name="job-worker", daemon=True)
+    thread.start()
+    return stop
+
+
+# ---- handlers ----
+
+@job("delete_company")
+def delete_company(company_id):
+    # Applications go first in chunks of DELETE_CHUNK, each chunk in its own short transaction
+    drive_ids = select(Placement.drive_id).where(Placement.company_id == company_id)
+
+    while True:
+        rows = db.session.execute(
+            select(Applications.app_id, Applications.student_id, Applications.drive_id, Applications.status)
+            .where(Applications.drive_id.in_(drive_ids))
+            .limit(DELETE_CHUNK)
+        ).all()
+        if not rows:
+            break
+
+        conn = db.session.connection()
+        selected = {r.student_id for r in rows if r.status == "Selected"}
+        placed_before = aggregates.placed_students(conn, selected) if selected else set()
+
+        conn.execute(delete(Applications).where(Applications.app_id.in_([r.app_id for r in rows])))
+
+        # raw DELETE skips the ORM events, keep the statistics right after every chunk
+        aggregates.applications_removed(conn, Counter((r.drive_id, r.status) for r in rows))
+        if selected:
+            aggregates.placements_changed(conn, placed_before, aggregates.placed_students(conn, selected))
+        db.session.commit()
+
+    user_id = db.session.execute(select(Company.user_id).where(Company.company_id == company_id)
+                                 .execution_options(include_deleted=True)).scalar()
+    db.session.execute(delete(DriveStats).where(DriveStats.drive_id.in_(drive_ids)))
+    db.session.execute(delete(Placement).where(Placement.company_id == company_id))
+    db.session.execute(delete(CompanyStats).where(CompanyStats.company_id == company_id))
+    db.session.execute(delete(Company).where(Company.company_id == company_id))
+    db.session.commit()
+
+    eligibility.invalidate("drives")
+    fragments.bump("drives", "applications")
+    if user_id is not None:
+        identity_cache.discard(user_id)
+
+
+@click.command("jobs-worker")
+@with_appcontext
+def worker_command():
+    """Run queued jobs and send notifications until stopped."""
+    click.echo("Job worker started, Ctrl+C to stop.")
+    work(current_app._get_current_object())
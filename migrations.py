@@ -0,0 +1,128 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import inspect, text, update
+
+from models import db, SchemaVersion, Placement, DRIVE_OPEN, DRIVE_CLOSED
+from search import create_fts
+import aggregates
+
+
+# Versioned schema upgrades.
+# Tables come from models.py (db.create_all only adds missing tables), then
+# every migration newer than the version stored in `schema_version` is run.
+# A brand new database simply runs all of them, so migrations must be idempotent.
+# To change the schema: edit models.py AND append a migration here.
+
+
+def _m1_indexes(conn):
+    # Old databases may already hold double applications, keep the first one
+    conn.execute(text("""
+        DELETE FROM application
+        WHERE app_id NOT IN (
+            SELECT MIN(app_id) FROM application GROUP BY student_id, drive_id
+        )
+    """))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_application_student_drive ON application (student_id, drive_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_application_drive_date ON application (drive_id, app_date, app_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_placement_drives_company_id ON placement_drives (company_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_placement_drives_deadline ON placement_drives (deadline, drive_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_company_profile_is_blacklisted ON company_profile (is_blacklisted)"))
+
+
+def _m2_full_text_search(conn):
+    create_fts(conn)
+
+
+def _m3_placement_stats(conn):
+    # The summary tables were just created by db.create_all(), fill them from existing rows
+    aggregates.rebuild()
+
+
+def _m4_drive_deadlines(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_placement_drives_status_deadline "
+                      "ON placement_drives (drive_status, deadline, drive_id)"))
+    # Close everything that expired before deadlines were enforced
+    conn.execute(update(Placement)
+                 .where(Placement.drive_status == DRIVE_OPEN, Placement.deadline <= datetime.now())
+                 .values(drive_status=DRIVE_CLOSED))
+
+
+def _m5_idempotency_key(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("application")}
+    if "idempotency_key" not in columns:
+        conn.execute(text("ALTER TABLE application ADD COLUMN idempotency_key VARCHAR(64)"))
+
+
+def _m6_row_versions(conn):
+    for table in ("company_profile", "student_profile", "placement_drives", "application"):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "row_version" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1"))
+
+
+def _m7_soft_deletes(conn):
+    # The archive tables were just created by db.create_all()
+    for table in ("company_profile", "student_profile"):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "deleted_at" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN deleted_at TIMESTAMP"))
+
+
+def _m8_resume_store(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("student_profile")}
+    for column, type_ in (("resume_sha256", "VARCHAR(64)"), ("resume_name", "VARCHAR(100)")):
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE student_profile ADD COLUMN {column} {type_}"))
+
+
+def _m9_notification_claims(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("notifications")}
+    if "claimed_at" not in columns:
+        conn.execute(text("ALTER TABLE notifications ADD COLUMN claimed_at TIMESTAMP"))
+
+
+MIGRATIONS = [
+    (1, _m1_indexes),
+    (2, _m2_full_text_search),
+    (3, _m3_placement_stats),
+    (4, _m4_drive_deadlines),
+    (5, _m5_idempotency_key),
+    (6, _m6_row_versions),
+    (7, _m7_soft_deletes),
+    (8, _m8_resume_store),
+    (9, _m9_notification_claims),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version():
+    row = SchemaVersion.query.first()
+    return row.version if row else 0
+
+
+def _set_version(version):
+    row = SchemaVersion.query.first()
+    if row:
+        row.version = version
+    else:
+        db.session.add(SchemaVersion(version=version))
+    db.session.commit()
+
+
+def upgrade_db():                                          # CALL INSIDE app.app_context()
+    # Creates only the tables that are missing, never alters existing ones
+    db.create_all()
+
+    version = current_version()
+    db.session.close()
+    for number, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with db.engine.begin() as conn:
+            migrate(conn)
+        _set_version(number)
+        current_app.logger.info("Database migrated to version %d", number)
+
+    return max(version, LATEST_VERSION)
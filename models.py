@@ -1,9 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session, with_loader_criteria
 from datetime import datetime, timezone
 
 
 db = SQLAlchemy()
 
+APPLICATION_STATUSES = ["Applied", "Shortlisted", "Selected", "Rejected"] # every value Applications.status may take
+DRIVE_OPEN = "Approved"                                   # Placement.drive_status while applications are accepted
+DRIVE_CLOSED = "Closed"                                   # set by deadlines.py once the deadline has passed
+
 class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
@@ -35,7 +41,9 @@ class Company(db.Model):
     hr_contact = db.Column(db.String(100), nullable=False)
     website = db.Column(db.String(50), nullable=False)
     approval_status = db.Column(db.String(20), default="Pending") # Admin control
-    is_blacklisted = db.Column(db.Boolean, default=False)  # Admin control
+    is_blacklisted = db.Column(db.Boolean, default=False, index=True)  # Admin control
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default="1") # +1 on every change (API ETags)
+    deleted_at = db.Column(db.DateTime, nullable=True) # soft delete, hidden from every query (see below)
 
     drives = db.relationship('Placement', backref='company', lazy=True, cascade="all, delete-orphan") # Access all deives posted by (company.drives)
 
@@ -48,27 +56,200 @@ class Student(db.Model):
     cgpa = db.Column(db.Float, nullable=False)
     branch = db.Column(db.String(50), nullable=False)
     resume_url = db.Column(db.String(100), nullable=True)
+    resume_sha256 = db.Column(db.String(64), nullable=True) # uploaded resume in the resume store (resumes.py)
+    resume_name = db.Column(db.String(100), nullable=True) # file name it is downloaded under
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default="1") # +1 on every change (API ETags)
+    deleted_at = db.Column(db.DateTime, nullable=True) # soft delete, hidden from every query (see below)
 
-    applications = db.relationship('Applications', backref='student', lazy=True) # Access all application of this student by (student.applications)
+    applications = db.relationship('Applications', backref='student', lazy=True, cascade="all, delete-orphan") # Access all application of this student by (student.applications)
 
 
 class Placement(db.Model):
     __tablename__ = "placement_drives"
+    __table_args__ = (
+        db.Index("ix_placement_drives_deadline", "deadline", "drive_id"), # all drives ordered by deadline
+        db.Index("ix_placement_drives_status_deadline", "drive_status", "deadline", "drive_id"), # open drives only
+    )
     drive_id = db.Column(db.Integer, primary_key=True)
-    company_id = db.Column(db.Integer, db.ForeignKey("company_profile.company_id"), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey("company_profile.company_id"), nullable=False, index=True)
     job_title = db.Column(db.String(50), nullable=False)
     min_cgpa = db.Column(db.Float, nullable=False)
     deadline = db.Column(db.DateTime, nullable=False)
-    drive_status = db.Column(db.String(50), default="Approved")
+    drive_status = db.Column(db.String(50), default=DRIVE_OPEN)
     job_description = db.Column(db.Text, nullable=True)
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default="1") # +1 on every change (API ETags)
 
     applications = db.relationship('Applications', backref='drive', lazy=True, cascade="all, delete-orphan") # Access all drive of this application by (drive.applications)
 
 
 class Applications(db.Model):
     __tablename__ = "application"
+    __table_args__ = (
+        db.Index("ux_application_student_drive", "student_id", "drive_id", unique=True), # one application per student per drive
+        db.Index("ix_application_drive_date", "drive_id", "app_date", "app_id"), # applicants of a drive, newest page first
+    )
     app_id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("student_profile.student_id"), nullable=False)
     drive_id = db.Column(db.Integer, db.ForeignKey("placement_drives.drive_id"), nullable=False)
     app_date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc)) # Automatically add current date time
-    status = db.Column(db.String(50), default="Applied")
+    status = db.column_property(db.Column(db.String(50), default="Applied"), active_history=True) # old value loaded on change, the statistics need it
+    idempotency_key = db.Column(db.String(64), nullable=True) # form submission that created it (apply.py)
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default="1") # +1 on every change (API ETags)
+
+
+# Summary tables, kept up to date by aggregates.py (never edit by hand, use `flask stats-rebuild`)
+
+class DriveStats(db.Model):
+    __tablename__ = "drive_stats"
+    drive_id = db.Column(db.Integer, primary_key=True)
+    applied = db.Column(db.Integer, nullable=False, server_default="0")
+    shortlisted = db.Column(db.Integer, nullable=False, server_default="0")
+    selected = db.Column(db.Integer, nullable=False, server_default="0")
+    rejected = db.Column(db.Integer, nullable=False, server_default="0")
+
+
+class CompanyStats(db.Model):
+    __tablename__ = "company_stats"
+    company_id = db.Column(db.Integer, primary_key=True)
+    drives = db.Column(db.Integer, nullable=False, server_default="0")
+    applicants = db.Column(db.Integer, nullable=False, server_default="0")
+
+
+class BranchStats(db.Model):
+    __tablename__ = "branch_stats"
+    branch = db.Column(db.String(50), primary_key=True)
+    students = db.Column(db.Integer, nullable=False, server_default="0")
+    placed = db.Column(db.Integer, nullable=False, server_default="0") # students with at least one Selected application
+
+
+# Past seasons, moved out of placement_drives / application by archive.py.
+# Company name and branch are copied so reports survive later purges.
+
+class ArchivedDrive(db.Model):
+    __tablename__ = "placement_drives_archive"
+    drive_id = db.Column(db.Integer, primary_key=True) # same id as in placement_drives
+    season = db.Column(db.Integer, nullable=False, index=True) # 2025 = the season starting in SEASON_START_MONTH 2025
+    company_id = db.Column(db.Integer, nullable=False, index=True)
+    company_name = db.Column(db.String(50), nullable=False)
+    job_title = db.Column(db.String(50), nullable=False)
+    min_cgpa = db.Column(db.Float, nullable=False)
+    deadline = db.Column(db.DateTime, nullable=False)
+    drive_status = db.Column(db.String(50))
+    job_description = db.Column(db.Text, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+
+class ArchivedApplication(db.Model):
+    __tablename__ = "application_archive"
+    app_id = db.Column(db.Integer, primary_key=True) # same id as in application
+    season = db.Column(db.Integer, nullable=False, index=True)
+    student_id = db.Column(db.Integer, nullable=False, index=True)
+    drive_id = db.Column(db.Integer, nullable=False, index=True)
+    branch = db.Column(db.String(50), nullable=True) # student's branch when archived
+    app_date = db.Column(db.DateTime)
+    status = db.Column(db.String(50))
+
+
+# Background work, see jobs.py and notifications.py
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_after", "status", "run_after", "id"), # next job to claim
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}") # JSON keyword arguments of the handler
+    status = db.Column(db.String(20), nullable=False, default="queued") # queued / running / done / failed
+    attempts = db.Column(db.Integer, nullable=False, server_default="0")
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+
+class Notification(db.Model):
+    __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index("ix_notifications_unsent", "sent_at", "id"), # outbox, oldest unsent first
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False) # status_changed / new_drive / eligible
+    student_id = db.Column(db.Integer, nullable=True) # None for new_drive, expanded into one eligible row per student
+    drive_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(50), nullable=True) # new application status for status_changed
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True) # taken by a dispatcher, see notifications.claim_batch
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0) # Last migration applied (see migrations.py)
+
+
+# Row versions: every ORM update of a versioned row bumps row_version.
+# Bulk UPDATEs that bypass the ORM must do `row_version=Model.row_version + 1` themselves.
+def _bump_row_version(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        target.row_version = (target.row_version or 0) + 1
+
+
+for _model in (Company, Student, Placement, Applications):
+    event.listen(_model, "before_update", _bump_row_version)
+
+
+# Soft deletes: a Student / Company with deleted_at set is left out of every ORM
+# query, joins and relationship loads included. Statements that must see them
+# (statistics, archive, purge) use .execution_options(include_deleted=True).
+# Raw connection / text() SQL is not filtered.
+SOFT_DELETE = (Student, Company)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_soft_deleted(state):
+    if state.is_select and not state.is_column_load and not state.execution_options.get("include_deleted", False):
+        state.statement = state.statement.options(
+            *[with_loader_criteria(model, model.deleted_at.is_(None), include_aliases=True) for model in SOFT_DELETE]
+        )
+
+
+# Caches and schedulers must only act on committed data. on_commit() collects what
+# a flush changed in session.info[key] and hands it to `callback` after the commit;
+# a rollback drops it.
+#
+#   on_commit((Placement,), "new_deadlines", schedule_all,
+#             lambda mapper, connection, target: [(target.deadline, target.drive_id)])
+CHANGE_EVENTS = ("after_insert", "after_update", "after_delete")
+_commit_callbacks = {}                                    # session.info key -> callback(set of items)
+
+
+def on_commit(models, key, callback, changes=None, events=CHANGE_EVENTS):
+    # changes(mapper, connection, target) -> items to collect (default: the model class), empty to skip
+    _commit_callbacks[key] = callback
+
+    def collect(mapper, connection, target):
+        items = changes(mapper, connection, target) if changes else (mapper.class_,)
+        session = object_session(target)
+        if session is not None and items:
+            session.info.setdefault(key, set()).update(items)
+
+    for model in models:
+        for name in events:
+            event.listen(model, name, collect)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session):
+    for key, callback in _commit_callbacks.items():
+        items = session.info.pop(key, None)
+        if items:
+            callback(items)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_commit_items(session):
+    for key in _commit_callbacks:
+        session.info.pop(key, None)
@@ -0,0 +1,210 @@
+import json
+import os
+import smtplib
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from urllib.parse import urlparse
+
+from flask import current_app
+from sqlalchemy import event, insert, inspect, literal, or_, select, update
+
+from models import db, User, Student, Company, Placement, Applications, Notification, DRIVE_OPEN
+
+
+# Student notifications through an outbox.
+# Status changes and new drives only add a row to `notifications`, in the same
+# transaction as the change itself. The job worker (jobs.py) claims a batch of
+# NOTIFY_BATCH unsent rows (claimed_at), so worker processes never share a row.
+# A new_drive row is expanded into one `eligible` row per eligible student
+# (INSERT ... SELECT) and those are sent like any other row, so memory and the
+# work repeated after a failed send are bounded by the batch. Sinks (NOTIFY_SINK):
+#
+#   file:notifications.log        JSON lines, relative paths are inside the instance folder
+#   smtp://localhost:1025         any SMTP server, e.g. `python -m aiosmtpd -n -l localhost:1025`
+
+STATUS_CHANGED = "status_changed"
+NEW_DRIVE = "new_drive"
+ELIGIBLE = "eligible"                                      # one student of a new_drive
+
+CLAIM_TIMEOUT = timedelta(minutes=10)                      # a claimed batch still unsent by then is picked up again
+
+
+# ---- sinks ----
+
+class FileSink:
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, messages):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            for message in messages:
+                f.write(json.dumps(message) + "\n")
+
+
+class SMTPSink:
+    def __init__(self, host, port, sender):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, messages):
+        with smtplib.SMTP(self.host, self.port) as smtp:   # one connection per batch
+            for message in messages:
+                email = EmailMessage()
+                email["From"] = self.sender
+                email["To"] = message["to"]
+                email["Subject"] = message["subject"]
+                email.set_content(message["body"])
+                smtp.send_message(email)
+
+
+def make_sink():
+    url = current_app.config["NOTIFY_SINK"]
+    if url.startswith("smtp://"):
+        parsed = urlparse(url)
+        return SMTPSink(parsed.hostname or "localhost", parsed.port or 25, current_app.config["NOTIFY_SENDER"])
+    if url.startswith("file:"):
+        path = url[len("file:"):]
+        return FileSink(os.path.join(current_app.instance_path, path))
+    raise ValueError(f"unknown NOTIFY_SINK {url!r}")
+
+
+# ---- outbox ----
+
+def statuses_changed(conn, pairs, status):                 # FOR BULK STATUS UPDATES (review.py)
+    # pairs: (student_id, drive_id)
+    if pairs:
+        conn.execute(insert(Notification), [
+            {"kind": STATUS_CHANGED, "student_id": student_id, "drive_id": drive_id, "status": status}
+            for student_id, drive_id in pairs
+        ])
+
+
+def _application_updated(mapper, conn, target):
+    history = inspect(target).attrs.status.history
+    if history.added and history.deleted and history.added[0] != history.deleted[0]:
+        statuses_changed(conn, [(target.student_id, target.drive_id)], target.status)
+
+
+def _drive_inserted(mapper, conn, target):
+    conn.execute(insert(Notification).values(kind=NEW_DRIVE, drive_id=target.drive_id))
+
+
+event.listen(Applications, "after_update", _application_updated)
+event.listen(Placement, "after_insert", _drive_inserted)
+
+
+# ---- dispatch ----
+
+def _status_messages(rows):
+    ids = [row.id for row in rows]
+    recipients = db.session.execute(
+        select(Notification.id, Notification.status, User.email, Student.full_name, Placement.job_title,
+               Company.company_name)
+        .join(Student, Student.student_id == Notification.student_id)
+        .join(User, User.id == Student.user_id)
+        .join(Placement, Placement.drive_id == Notification.drive_id)
+        .join(Company, Company.company_id == Placement.company_id)
+        .where(Notification.id.in_(ids))
+    )
+    return [
+        {"to": r.email, "subject": f"Application update: {r.job_title}",
+         "body": f"Hi {r.full_name}, your application for {r.job_title} at {r.company_name} is now {r.status}."}
+        for r in recipients
+    ]
+
+
+def _eligible_messages(rows):
+    ids = [row.id for row in rows]
+    recipients = db.session.execute(
+        select(User.email, Student.full_name, Placement.job_title, Placement.deadline, Company.company_name)
+        .select_from(Notification)
+        .join(Student, Student.student_id == Notification.student_id)
+        .join(User, User.id == Student.user_id)
+        .join(Placement, Placement.drive_id == Notification.drive_id)
+        .join(Company, Company.company_id == Placement.company_id)
+        .where(Notification.id.in_(ids), Placement.drive_status == DRIVE_OPEN, Company.is_blacklisted == False)
+    )
+    return [
+        {"to": r.email, "subject": f"New drive: {r.job_title} at {r.company_name}",
+         "body": f"Hi {r.full_name}, you are eligible for {r.job_title} at {r.company_name}. "
+                 f"Apply before {r.deadline:%d-%b-%Y}."}
+        for r in recipients
+    ]
+
+
+def _expand_new_drive(row):
+    # One `eligible` row per student that meets the cgpa cut-off, nothing when the drive
+    # was deleted, closed or blacklisted before we got to it. The parent row is marked
+    # sent in the same transaction, and only when it was not yet, so it expands once.
+    marked = db.session.execute(
+        update(Notification).where(Notification.id == row.id, Notification.sent_at.is_(None))
+        .values(sent_at=datetime.now()),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not marked:
+        return
+
+    eligible = (
+        select(literal(ELIGIBLE), Student.student_id, Placement.drive_id)
+        .join(Placement, Student.cgpa >= Placement.min_cgpa)
+        .join(Company, Company.company_id == Placement.company_id)
+        .where(Placement.drive_id == row.drive_id, Placement.drive_status == DRIVE_OPEN,
+               Company.is_blacklisted == False)
+    )
+    db.session.execute(insert(Notification).from_select(["kind", "student_id", "drive_id"], eligible))
+
+
+def claim_batch(limit):
+    # Unsent rows nobody is working on (or whose worker died) become ours with one UPDATE ... RETURNING,
+    # so concurrent dispatchers never send the same notification
+    now = datetime.now()
+    available = (
+        select(Notification.id)
+        .where(Notification.sent_at.is_(None),
+               or_(Notification.claimed_at.is_(None), Notification.claimed_at < now - CLAIM_TIMEOUT))
+    )
+    if db.session.execute(available.limit(1)).first() is None:   # idle: a plain read, no write lock
+        return []
+
+    batch = available.order_by(Notification.id).limit(limit).with_for_update(skip_locked=True)
+    rows = db.session.execute(
+        update(Notification)
+        .where(Notification.id.in_(batch.scalar_subquery()), Notification.sent_at.is_(None))
+        .values(claimed_at=now)
+        .returning(Notification.id, Notification.kind, Notification.drive_id),
+        execution_options={"synchronize_session": False},
+    ).all()
+    db.session.commit()
+    return sorted(rows, key=lambda r: r.id)
+
+
+def _mark_sent(rows):
+    db.session.execute(
+        update(Notification).where(Notification.id.in_([r.id for r in rows])).values(sent_at=datetime.now()),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+
+
+def dispatch(sink=None):
+    # Handles one claimed batch of the outbox, returns the number of outbox rows handled
+    rows = claim_batch(current_app.config["NOTIFY_BATCH"])
+    if not rows:
+        return 0
+
+    new_drives = [r for r in rows if r.kind == NEW_DRIVE]
+    if new_drives:                                         # committed before anything is sent
+        for row in new_drives:
+            _expand_new_drive(row)
+        db.session.commit()
+
+    messages = _status_messages([r for r in rows if r.kind == STATUS_CHANGED])
+    messages.extend(_eligible_messages([r for r in rows if r.kind == ELIGIBLE]))
+    if messages:
+        (sink or make_sink()).send(messages)
+
+    # at least once: a crash between send and this update sends the batch again
+    _mark_sent([r for r in rows if r.kind != NEW_DRIVE])
+    return len(rows)
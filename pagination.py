@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from sqlalchemy import and_, or_
+
+
+# Keyset (seek) pagination.
+# Instead of OFFSET we remember the sort key of the last row shown and ask for
+# rows after it, so every page costs the same whether there are 100 or 500,000 rows.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def get_page_size(arg_name="per_page"):
+    try:
+        size = int(request.args.get(arg_name, DEFAULT_PAGE_SIZE))
+    except ValueError:
+        size = DEFAULT_PAGE_SIZE
+
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(direction, values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"d": direction, "k": values}, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, columns):
+    # Returns (direction, key values) or (None, None) for a missing / broken cursor
+    if not token:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        direction = data["d"]
+        values = data["k"]
+        if direction not in ("n", "p") or len(values) != len(columns):
+            return None, None
+
+        keys = []
+        for column, value in zip(columns, values):
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            keys.append(value)
+
+        return direction, keys
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+
+def _after(columns, values, forward):
+    # (c1, c2) > (v1, v2)  ==  c1 > v1 OR (c1 == v1 AND c2 > v2)
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        step = column > values[i] if forward else column < values[i]
+        clauses.append(and_(*equal, step))
+
+    return or_(*clauses)
+
+
+def _row_key(row, columns):
+    return [getattr(row, column.key) for column in columns]
+
+
+def keyset_page(query, columns, cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    # `columns` is the stable ordering, the last one must be unique (usually the primary key)
+    direction, keys = decode_cursor(cursor, columns)
+    backwards = direction == "p"
+
+    if keys is not None:
+        query = query.filter(_after(columns, keys, forward=not backwards))
+
+    order = [c.desc() for c in columns] if backwards else [c.asc() for c in columns]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return Page([])
+
+    first_key = _row_key(rows[0], columns)
+    last_key = _row_key(rows[-1], columns)
+
+    if backwards:
+        next_cursor = encode_cursor("n", last_key)
+        prev_cursor = encode_cursor("p", first_key) if has_more else None
+    else:
+        next_cursor = encode_cursor("n", last_key) if has_more else None
+        prev_cursor = encode_cursor("p", first_key) if keys is not None else None
+
+    return Page(rows, next_cursor, prev_cursor)
+
+
+def page_url(arg_name, cursor):                                # USED BY _pager.html
+    args = request.args.to_dict()
+    args[arg_name] = cursor
+    args.update(request.view_args or {})
+
+    return url_for(request.endpoint, **args)
@@ -0,0 +1,95 @@
+import os
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+# Password hashing off the request thread.
+# scrypt / pbkdf2 are deliberately slow, so a burst of logins would otherwise
+# eat all the CPU of the web process. Hashes are computed in a small process
+# pool (PASSWORD_HASH_WORKERS), at most QUEUE_PER_WORKER jobs per worker wait
+# for it and anything beyond that gets HashingBusy instead of piling up.
+# PASSWORD_HASH_WORKERS = 0 hashes inline (tests, CLI tools).
+
+QUEUE_PER_WORKER = 4
+
+
+class HashingBusy(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_slots = None
+
+
+def _config(name):
+    return current_app.config[name]
+
+
+def _get_pool():
+    global _pool, _pool_pid, _slots
+
+    workers = _config("PASSWORD_HASH_WORKERS")
+    if workers <= 0:
+        return None
+
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():      # a forked web worker needs its own pool
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(workers * QUEUE_PER_WORKER)
+
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _lock:
+        _pool = None
+
+
+def _run(fn, *args):
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+
+    slots = _slots
+    if not slots.acquire(timeout=_config("PASSWORD_HASH_TIMEOUT")):
+        raise HashingBusy()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        _reset_pool()
+        return fn(*args)
+    finally:
+        slots.release()
+
+
+def hash_method():
+    return _config("PASSWORD_HASH_METHOD")
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=8)
+def stored_method(method):
+    # The method as werkzeug writes it into a hash, "scrypt" is stored as "scrypt:32768:8:1".
+    # Hashing once per setting is the only way to get werkzeug's defaults right.
+    return generate_password_hash("x", method).split("$", 1)[0]
+
+
+def needs_rehash(pwhash):
+    # werkzeug hashes look like "scrypt:32768:8:1$salt$hash"
+    return pwhash.split("$", 1)[0] != stored_method(hash_method())
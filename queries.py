@@ -0,0 +1,116 @@
+from datetime import datetime
+
+from sqlalchemy import func
+
+from models import db, Student, Company, Placement, Applications, DriveStats, DRIVE_OPEN
+from pagination import keyset_page, DEFAULT_PAGE_SIZE
+from eligibility import eligible_drive_ids
+
+
+# Read-side queries for the dashboards.
+# Each function returns plain column rows (no lazy relationships), so the
+# templates never fire extra SELECTs per row.
+
+
+def open_drives_query():
+    return (
+        db.session.query(
+            Placement.drive_id,
+            Placement.job_title,
+            Placement.min_cgpa,
+            Placement.deadline,
+            Placement.drive_status,
+            Company.company_name,
+        )
+        .join(Company, Placement.company_id == Company.company_id)
+        .filter(
+            Company.is_blacklisted == False,
+            Placement.drive_status == DRIVE_OPEN,          # closed / expired drives drop out of the working set
+            Placement.deadline > datetime.now(),
+        )
+    )
+
+
+def company_drives_query(company_id):
+    # applicant counts come from the summary table kept by aggregates.py
+    applicant_count = func.coalesce(
+        DriveStats.applied + DriveStats.shortlisted + DriveStats.selected + DriveStats.rejected, 0
+    )
+
+    return (
+        db.session.query(
+            Placement.drive_id,
+            Placement.job_title,
+            Placement.deadline,
+            Placement.drive_status,
+            applicant_count.label("applicant_count"),
+        )
+        .outerjoin(DriveStats, DriveStats.drive_id == Placement.drive_id)
+        .filter(Placement.company_id == company_id)
+    )
+
+
+def all_drives_query():
+    return (
+        db.session.query(
+            Placement.drive_id,
+            Placement.job_title,
+            Placement.min_cgpa,
+            Placement.deadline,
+            Placement.drive_status,
+            Company.company_name,
+        )
+        .join(Company, Placement.company_id == Company.company_id)
+    )
+
+
+def drive_applications_query(drive_id):
+    return (
+        db.session.query(
+            Applications.app_id,
+            Applications.app_date,
+            Applications.status,
+            Student.student_id,
+            Student.full_name,
+            Student.branch,
+            Student.cgpa,
+            Student.resume_url,
+            Student.resume_sha256,
+        )
+        .join(Student, Applications.student_id == Student.student_id)
+        .filter(Applications.drive_id == drive_id)
+    )
+
+
+# Stable orderings for keyset pagination (last column is always unique)
+DRIVE_ORDER = [Placement.deadline, Placement.drive_id]
+APPLICATION_ORDER = [Applications.app_date, Applications.app_id]
+
+
+def student_applications_query(student_id):
+    return (
+        db.session.query(
+            Applications.app_id,
+            Applications.drive_id,
+            Applications.app_date,
+            Applications.status,
+            Placement.job_title,
+            Company.company_name,
+        )
+        .join(Placement, Applications.drive_id == Placement.drive_id)
+        .join(Company, Placement.company_id == Company.company_id)
+        .filter(Applications.student_id == student_id)
+    )
+
+
+def open_drives_page(cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    return keyset_page(open_drives_query(), DRIVE_ORDER, cursor, per_page)
+
+
+def student_dashboard_data(student):
+    # One round-trip no matter how many applications exist
+    applications = student_applications_query(student.student_id).all()
+    applied_ids = {row.drive_id for row in applications}
+    eligible_ids = set(eligible_drive_ids(student.cgpa))   # precomputed, no query
+
+    return applications, applied_ids, eligible_ids
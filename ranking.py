@@ -0,0 +1,177 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import func, inspect, select
+
+from models import db, Student, Placement, Applications, on_commit
+from queries import drive_applications_query
+
+try:
+    import numpy as np                                     # OPTIONAL, SCORES WHOLE DRIVES IN ONE VECTORIZED PASS
+except ImportError:
+    np = None
+
+
+# Ranked applicants for companies reviewing a drive.
+# Every applicant gets a weighted score, each part between 0 and 1:
+#   cgpa margin   (cgpa - min_cgpa) / (10 - min_cgpa)
+#   branch match  1 when the student's branch is one the recruiter prefers
+#   recency       0.5 ** (days before the newest application / RANK_RECENCY_HALF_LIFE_DAYS)
+# weighted by RANK_WEIGHT_CGPA / RANK_WEIGHT_BRANCH / RANK_WEIGHT_RECENCY.
+#
+# The inputs of a drive are loaded with one projection query into arrays and
+# cached per drive (RANK_CACHE_SIZE drives, RANK_CACHE_TTL seconds). An entry is
+# checked against the drive's (application count, highest app_id) on every use
+# and dropped once a change to one of its students or to the drive is committed. Only the
+# top K applicants are picked (argpartition, or a heap without NumPy) and only
+# those rows are fetched in full and rendered.
+
+MAX_CGPA = 10.0
+SECONDS_PER_DAY = 86400.0
+
+
+class DriveApplicants:
+    def __init__(self, rows, min_cgpa, fingerprint):
+        # rows: (app_id, cgpa, branch, app_date) of every application of one drive
+        self.fingerprint = fingerprint
+        self.built_at = time.monotonic()
+        self.branches = sorted({r.branch for r in rows if r.branch})
+
+        dates = [r.app_date.timestamp() if r.app_date else None for r in rows]
+        newest = max((d for d in dates if d is not None), default=0.0)
+        oldest = min((d for d in dates if d is not None), default=0.0)
+        span = max(MAX_CGPA - min_cgpa, 1e-9)
+        app_ids = [r.app_id for r in rows]
+        margins = [min(max((r.cgpa - min_cgpa) / span, 0.0), 1.0) for r in rows]
+        ages = [(newest - (d if d is not None else oldest)) / SECONDS_PER_DAY for d in dates]
+        self.code = {branch: i for i, branch in enumerate(self.branches)}
+        branch_codes = [self.code.get(r.branch, -1) for r in rows]
+
+        if np is not None:
+            self.app_ids = np.array(app_ids, dtype=np.int64)
+            self.margins = np.array(margins, dtype=np.float64)
+            self.ages = np.array(ages, dtype=np.float64)
+            self.branch_codes = np.array(branch_codes, dtype=np.int32)
+        else:
+            self.app_ids, self.margins, self.ages, self.branch_codes = app_ids, margins, ages, branch_codes
+
+    def __len__(self):
+        return len(self.app_ids)
+
+    def is_stale(self, ttl):
+        return time.monotonic() - self.built_at > ttl
+
+    def scores(self, weights, half_life, preferred):
+        w_cgpa, w_branch, w_recency = weights
+        preferred = {self.code[b] for b in preferred if b in self.code}
+        if np is not None:
+            match = np.isin(self.branch_codes, list(preferred))
+            return w_cgpa * self.margins + w_branch * match + w_recency * np.power(0.5, self.ages / half_life)
+
+        return [w_cgpa * m + w_branch * (b in preferred) + w_recency * 0.5 ** (a / half_life)
+                for m, b, a in zip(self.margins, self.branch_codes, self.ages)]
+
+    def top(self, k, weights, half_life, preferred=()):
+        # [(app_id, score)] of the k best applicants, best first (ties: earlier application first)
+        scores = self.scores(weights, half_life, preferred)
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+
+        if np is not None:
+            best = np.argpartition(-scores, k - 1)[:k] if k < len(self) else np.arange(len(self))
+            best = best[np.lexsort((self.app_ids[best], -scores[best]))]
+            return [(int(self.app_ids[i]), float(scores[i])) for i in best]
+
+        best = heapq.nlargest(k, range(len(self)), key=lambda i: (scores[i], -self.app_ids[i]))
+        return [(self.app_ids[i], scores[i]) for i in best]
+
+
+_lock = threading.Lock()
+_cache = OrderedDict()                                     # (engine url, drive_id) -> DriveApplicants
+
+
+def _fingerprint(drive_id):
+    # changes whenever an application of the drive is added or removed, raw SQL included
+    return tuple(db.session.execute(
+        select(func.count(Applications.app_id), func.max(Applications.app_id))
+        .where(Applications.drive_id == drive_id)
+    ).one())
+
+
+def _load(drive):
+    return (
+        db.session.query(Applications.app_id, Student.cgpa, Student.branch, Applications.app_date)
+        .join(Student, Applications.student_id == Student.student_id)
+        .filter(Applications.drive_id == drive.drive_id)
+        .all()
+    )
+
+
+def drive_applicants(drive):
+    config = current_app.config
+    key = (str(db.engine.url), drive.drive_id)
+    fingerprint = _fingerprint(drive.drive_id)
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.fingerprint == fingerprint and not entry.is_stale(config["RANK_CACHE_TTL"]):
+            _cache.move_to_end(key)
+            return entry
+
+    entry = DriveApplicants(_load(drive), drive.min_cgpa, fingerprint)
+    with _lock:
+        _cache[key] = entry
+        _cache.move_to_end(key)
+        while len(_cache) > config["RANK_CACHE_SIZE"]:
+            _cache.popitem(last=False)
+    return entry
+
+
+def ranked_applications(drive, k, preferred=()):
+    # The k best applications of `drive` as rows of drive_applications_query, best first
+    config = current_app.config
+    applicants = drive_applicants(drive)
+    weights = (config["RANK_WEIGHT_CGPA"], config["RANK_WEIGHT_BRANCH"], config["RANK_WEIGHT_RECENCY"])
+    top = applicants.top(k, weights, config["RANK_RECENCY_HALF_LIFE_DAYS"], preferred)
+
+    position = {app_id: i for i, (app_id, _) in enumerate(top)}
+    rows = drive_applications_query(drive.drive_id).filter(Applications.app_id.in_(list(position))).all()
+    rows.sort(key=lambda row: position[row.app_id])
+
+    return SimpleNamespace(rows=rows, scores=dict(top), total=len(applicants), branches=applicants.branches)
+
+
+def invalidate(drive_id=None):
+    with _lock:
+        for key in [k for k in _cache if drive_id is None or k[1] == drive_id]:
+            del _cache[key]
+
+
+# A committed change to a student's cgpa / branch invalidates the drives it applied to,
+# a change to a drive's min_cgpa (or its delete) that drive only
+def _student_drives(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if not attrs.cgpa.history.has_changes() and not attrs.branch.history.has_changes():
+        return []
+    return connection.execute(
+        select(Applications.drive_id).where(Applications.student_id == target.student_id)).scalars().all()
+
+
+def _drive_updated(mapper, connection, target):
+    return [target.drive_id] if inspect(target).attrs.min_cgpa.history.has_changes() else []
+
+
+def _invalidate_all(drive_ids):
+    for drive_id in drive_ids:
+        invalidate(drive_id)
+
+
+on_commit((Student,), "ranking_dirty", _invalidate_all, _student_drives, events=("after_update",))
+on_commit((Placement,), "ranking_dirty", _invalidate_all, _drive_updated, events=("after_update",))
+on_commit((Placement,), "ranking_dirty", _invalidate_all, lambda mapper, connection, target: [target.drive_id],
+          events=("after_delete",))
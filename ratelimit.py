@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+# In-memory token buckets for login throttling.
+# Every attempt takes one token from the bucket of its IP and one from the bucket
+# of the account it targets. Buckets refill continuously at `rate` tokens per
+# second up to `burst`. State is per process, which is enough to stop password
+# guessing and login storms from starving the rest of the app.
+
+
+class TokenBucketLimiter:
+    def __init__(self, burst, per_minute, max_keys=100000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = {}                                 # key -> [tokens, last refill time]
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def retry_after(self, key):
+        # seconds until the next token for `key`, 0 when one is available
+        with self._lock:
+            tokens = self._refill(key, time.monotonic())
+        if tokens >= 1:
+            return 0
+        return (1 - tokens) / self.rate if self.rate else float("inf")
+
+    def consume(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            if tokens < 1:
+                self._buckets[key] = [tokens, now]
+                return False
+            self._buckets[key] = [tokens - 1, now]
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return True
+
+    def _prune(self, now):
+        # full buckets carry no information, drop them
+        for key in [k for k in self._buckets if self._refill(k, now) >= self.burst]:
+            del self._buckets[key]
+
+
+class LoginThrottle:
+    def __init__(self, ip_burst, ip_per_minute, account_burst, account_per_minute):
+        self.by_ip = TokenBucketLimiter(ip_burst, ip_per_minute)
+        self.by_account = TokenBucketLimiter(account_burst, account_per_minute)
+
+    def attempt(self, ip, email):
+        # Returns 0 when the attempt may go ahead, otherwise seconds to wait
+        email = (email or "").strip().lower()
+        if not self.by_ip.consume(ip):
+            return self.by_ip.retry_after(ip) or 1
+        if not self.by_account.consume(email):
+            return self.by_account.retry_after(email) or 1
+        return 0
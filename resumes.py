@@ -0,0 +1,265 @@
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+
+import click
+from flask import Request, Response, current_app, request, send_file, stream_with_context
+from flask.cli import with_appcontext
+from sqlalchemy import exists, select
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from models import db, Student, Placement, Applications
+
+
+# Resume storage.
+# Uploaded resumes live in a content-addressed store under RESUME_DIR (relative
+# paths are inside the instance folder):
+#   <RESUME_DIR>/ab/cd/abcd...                             # file name = sha256 of the content
+# The same file uploaded twice, or by two students, is stored once, a stored file
+# never changes, and its hash doubles as the ETag. Student.resume_sha256 points
+# at the file, Student.resume_name keeps the name it is downloaded under.
+#
+# Uploads are streamed: the multipart parser writes the file part straight into
+# a temp file inside the store, hashing it on the way, and the request fails with
+# 413 as soon as RESUME_MAX_BYTES is passed. Downloads go through send_file
+# (Range requests, If-None-Match / If-Modified-Since), and the zip of a whole
+# drive is written to the response one file at a time, never held in memory.
+# `flask resumes-gc` deletes files that no student points at any more.
+
+CHUNK = 64 * 1024
+FORM_OVERHEAD = 16 * 1024                                  # multipart headers and the other form fields
+GC_GRACE = 3600                                            # seconds, younger files may belong to an upload not committed yet
+YIELD_PER = 500
+
+SIGNATURES = [
+    # (first bytes, extension, mimetype)
+    (b"%PDF-", ".pdf", "application/pdf"),
+    (b"PK\x03\x04", ".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    (b"\xd0\xcf\x11\xe0", ".doc", "application/msword"),
+]
+MIMETYPES = {ext: mimetype for _, ext, mimetype in SIGNATURES}
+
+
+class InvalidResume(ValueError):
+    pass
+
+
+class IncomingFile:
+    # Write side of one upload: a temp file inside the store, hashed and size checked as the parser writes it
+    def __init__(self, directory, limit):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix="upload-")
+        self.file = os.fdopen(fd, "w+b")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.limit = limit
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.limit:
+            self.close()
+            raise RequestEntityTooLarge()
+        self.sha256.update(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):                           # read / seek / tell / flush for FileStorage
+        return getattr(self.file, name)
+
+    def close(self):
+        # Called when the request ends, the file is gone already if it made it into the store
+        self.file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class ResumeStore:
+    def __init__(self, root):
+        self.root = root
+        self.incoming = os.path.join(root, "incoming")
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def add(self, upload):
+        # upload: a completely written IncomingFile. Returns (sha256, extension)
+        if upload.size == 0:
+            raise InvalidResume("The uploaded file is empty.")
+        upload.seek(0)
+        head = upload.read(8)
+        extension = next((ext for magic, ext, _ in SIGNATURES if head.startswith(magic)), None)
+        if extension is None:
+            raise InvalidResume("Resumes must be PDF or Word documents.")
+
+        digest = upload.sha256.hexdigest()
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            os.utime(path)                                 # already stored, keep it away from resumes-gc
+        else:
+            upload.flush()
+            os.fsync(upload.fileno())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(upload.path, path)                  # atomic, a concurrent upload of the same file is harmless
+        upload.close()
+
+        return digest, extension
+
+    def collect_garbage(self, referenced, grace=GC_GRACE):
+        # Deletes stored files not in `referenced` and abandoned uploads, returns (files, bytes) removed
+        cutoff = time.time() - grace
+        files = size = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name in referenced or os.path.getmtime(path) > cutoff:
+                    continue
+                size += os.path.getsize(path)
+                os.unlink(path)
+                files += 1
+
+        return files, size
+
+
+def store():
+    return current_app.extensions["resume_store"]
+
+
+def init_app(app):
+    app.request_class = UploadRequest
+    app.extensions["resume_store"] = ResumeStore(os.path.join(app.instance_path, app.config["RESUME_DIR"]))
+
+
+class UploadRequest(Request):
+    # File parts of a resume upload (see receive_upload) are written straight into the store
+    resume_upload_limit = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.resume_upload_limit is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return IncomingFile(store().incoming, self.resume_upload_limit)
+
+
+def resume_name(filename, extension):
+    name = os.path.splitext(secure_filename(filename or ""))[0][:80] or "resume"
+    return name + extension
+
+
+def receive_upload(field="resume"):
+    # Stores the resume uploaded with this request, returns (sha256, name).
+    # Raises InvalidResume, or RequestEntityTooLarge past RESUME_MAX_BYTES.
+    limit = current_app.config["RESUME_MAX_BYTES"]
+    request.resume_upload_limit = limit
+    request.max_content_length = limit + FORM_OVERHEAD    # refused up front when Content-Length says so
+
+    upload = request.files.get(field)
+    if upload is None or not upload.filename:
+        raise InvalidResume("Choose a file to upload.")
+    digest, extension = store().add(upload.stream)
+
+    return digest, resume_name(upload.filename, extension)
+
+
+# ---- downloads ----
+
+def can_download(identity, student_id):
+    if identity.role == "Admin":
+        return True
+    if identity.student is not None:
+        return identity.student.student_id == student_id
+    if identity.company is not None:
+        # only students that applied to one of the company's drives
+        return db.session.execute(select(exists().where(
+            Applications.student_id == student_id,
+            Applications.drive_id == Placement.drive_id,
+            Placement.company_id == identity.company.company_id,
+        ))).scalar()
+    return False
+
+
+def send_resume(digest, name):
+    _, extension = os.path.splitext(name)
+    response = send_file(store().path_for(digest), mimetype=MIMETYPES.get(extension, "application/octet-stream"),
+                         download_name=name, conditional=True, etag=digest)
+    response.cache_control.private = True
+
+    return response
+
+
+class _ZipOutput:
+    # Write-only file object without seek / tell, so zipfile streams (data descriptors after each file)
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
+def drive_resumes(drive_id):
+    return (
+        select(Student.student_id, Student.full_name, Student.resume_sha256, Student.resume_name)
+        .join(Applications, Applications.student_id == Student.student_id)
+        .where(Applications.drive_id == drive_id, Student.resume_sha256.isnot(None))
+        .order_by(Applications.app_id)
+    )
+
+
+def generate_zip(stmt):
+    # Resumes are already compressed (PDF / DOCX), so they are stored as they are
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+        result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+        for batch in result.partitions():
+            for row in batch:
+                path = store().path_for(row.resume_sha256)
+                if not os.path.exists(path):
+                    continue
+                _, extension = os.path.splitext(row.resume_name)
+                info = zipfile.ZipInfo(f"{row.student_id}_{secure_filename(row.full_name) or 'student'}{extension}",
+                                       date_time=time.localtime(os.path.getmtime(path))[:6])
+                with open(path, "rb") as source, archive.open(info, "w") as target:
+                    while chunk := source.read(CHUNK):
+                        target.write(chunk)
+                        if output.size >= CHUNK:
+                            yield output.take()
+                yield output.take()
+
+    yield output.take()                                    # central directory
+
+
+def zip_response(stmt, filename):
+    response = Response(stream_with_context(generate_zip(stmt)), mimetype="application/zip")
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.zip"'
+
+    return response
+
+
+# ---- housekeeping ----
+
+def collect_garbage():
+    referenced = set(db.session.execute(
+        select(Student.resume_sha256).where(Student.resume_sha256.isnot(None))
+        .execution_options(include_deleted=True)           # kept until the student is purged
+    ).scalars())
+    return store().collect_garbage(referenced)
+
+
+@click.command("resumes-gc")
+@with_appcontext
+def gc_command():
+    """Delete stored resumes that no student points at any more."""
+    files, size = collect_garbage()
+    click.echo(f"Removed {files} files ({size // 1024} KB).")
@@ -0,0 +1,84 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import select, update
+
+from models import db, Student, Applications, APPLICATION_STATUSES
+import aggregates
+import fragments
+import notifications
+
+
+# Bulk review of the applications of one drive.
+# The matching rows are picked with one SELECT and changed with one
+# UPDATE ... WHERE app_id IN (...) AND status = <old status> per old status and
+# UPDATE_CHUNK ids, all in a single transaction. A row another request changed
+# in between no longer matches and is left alone, so the statistics, adjusted
+# here from what the UPDATEs RETURNed (raw SQL does not fire the ORM events),
+# stay exact. The page cache and the notification outbox are told directly.
+#
+#   update_statuses(drive_id, "Shortlisted", app_ids=[3, 4, 9])
+#   update_statuses(drive_id, "Shortlisted", min_cgpa=8, only_status="Applied")
+
+UPDATE_CHUNK = 900                                         # stay under SQLite's old limit of 999 bound parameters
+
+
+def parse_status(value):
+    # Returns the status when it is one of APPLICATION_STATUSES, otherwise None
+    return value if value in APPLICATION_STATUSES else None
+
+
+def target_applications(drive_id, new_status, app_ids=None, min_cgpa=None, only_status=None):
+    stmt = (
+        select(Applications.app_id, Applications.student_id, Applications.status)
+        .where(Applications.drive_id == drive_id, Applications.status != new_status)
+    )
+    if app_ids is not None:
+        stmt = stmt.where(Applications.app_id.in_(app_ids))
+    if min_cgpa is not None:
+        stmt = stmt.join(Student, Student.student_id == Applications.student_id).where(Student.cgpa >= min_cgpa)
+    if only_status is not None:
+        stmt = stmt.where(Applications.status == only_status)
+    return stmt
+
+
+def update_statuses(drive_id, new_status, app_ids=None, min_cgpa=None, only_status=None):
+    # Caller has checked that the drive belongs to the company. Returns the number of applications changed.
+    conn = db.session.connection()
+    rows = conn.execute(target_applications(drive_id, new_status, app_ids, min_cgpa, only_status)).all()
+    if not rows:
+        return 0
+
+    by_status = defaultdict(list)
+    for row in rows:
+        by_status[row.status].append(row.app_id)
+
+    changed = []                                           # (student_id, old status) of the rows really updated
+    for old_status, ids in by_status.items():
+        for i in range(0, len(ids), UPDATE_CHUNK):
+            changed.extend((student_id, old_status) for student_id in conn.execute(
+                update(Applications)
+                .where(Applications.drive_id == drive_id, Applications.app_id.in_(ids[i:i + UPDATE_CHUNK]),
+                       Applications.status == old_status)
+                .values(status=new_status, row_version=Applications.row_version + 1)
+                .returning(Applications.student_id)
+            ).scalars())
+    if not changed:
+        db.session.rollback()
+        return 0
+
+    aggregates.statuses_changed(conn, drive_id, [old for _, old in changed], new_status)
+    notifications.statuses_changed(conn, [(student_id, drive_id) for student_id, _ in changed], new_status)
+
+    if new_status == "Selected" or any(old == "Selected" for _, old in changed):
+        # The write lock is ours since the first UPDATE, so "placed before" is worked out
+        # from the current counts minus this change instead of a read taken before it
+        delta = Counter()
+        for student_id, old in changed:
+            delta[student_id] += (new_status == "Selected") - (old == "Selected")
+        after = aggregates.selected_counts(conn, set(delta))
+        aggregates.placements_changed(conn, {s for s in delta if after.get(s, 0) - delta[s] > 0},
+                                      {s for s in delta if after.get(s, 0) > 0})
+
+    db.session.commit()
+    fragments.bump("applications")
+    return len(changed)
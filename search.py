@@ -0,0 +1,133 @@
+import re
+
+from sqlalchemy import Float, column, inspect, literal, literal_column, or_, select, table, text, union_all
+
+from models import db, Student, Company, Placement
+from pagination import keyset_page, DEFAULT_PAGE_SIZE
+from queries import all_drives_query
+
+
+# Full-text search for the admin dashboard (SQLite FTS5).
+# Each FTS table is an "external content" index over a real table and is kept
+# in sync by triggers, so every insert/update/delete (ORM or raw SQL) is indexed.
+# On databases without FTS5 the functions fall back to the old ILIKE search.
+
+FTS_TABLES = {
+    # fts table:    (content table,      rowid column,  indexed columns)
+    "student_fts": ("student_profile", "student_id", ["full_name", "branch"]),
+    "company_fts": ("company_profile", "company_id", ["company_name", "website"]),
+    "drive_fts": ("placement_drives", "drive_id", ["job_title", "job_description"]),
+}
+
+_fts_ready = {}
+
+
+def create_fts(conn):                                      # USED BY migrations.py
+    if conn.dialect.name != "sqlite":
+        return
+
+    for fts, (source, key, cols) in FTS_TABLES.items():
+        names = ", ".join(cols)
+        new_values = ", ".join(f"new.{c}" for c in cols)
+        old_values = ", ".join(f"old.{c}" for c in cols)
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{names}, content='{source}', content_rowid='{key}', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts}(rowid, {names}) VALUES (new.{key}, {new_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{key}, {old_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {source} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{key}, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {names}) VALUES (new.{key}, {new_values}); END"
+        ))
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def rebuild_fts():
+    with db.engine.begin() as conn:
+        for fts in FTS_TABLES:
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def fts_available():
+    url = str(db.engine.url)
+    if url not in _fts_ready:
+        _fts_ready[url] = (
+            db.engine.dialect.name == "sqlite"
+            and all(inspect(db.engine).has_table(fts) for fts in FTS_TABLES)
+        )
+
+    return _fts_ready[url]
+
+
+def match_expression(search_query):
+    # "data ana" -> "data"* "ana"*  (every word must match, each as a prefix)
+    words = re.findall(r"\w+", search_query)
+
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _ranked_ids(fts, search_query, key):
+    fts_table = table(fts, column("rowid"))
+    rank = literal_column(f"bm25({fts})", Float).label("rank")
+    ranked = (
+        select(fts_table.c.rowid.label("id"), rank)
+        .where(text(f"{fts} MATCH :match").bindparams(match=match_expression(search_query)))
+    )
+
+    if search_query.isdigit():
+        # An exact ID match is listed first (bm25 ranks are negative, smaller is better)
+        exact_id = int(search_query)
+        exact = select(key.label("id"), literal(-1e308, Float).label("rank")).where(key == exact_id)
+        ranked = union_all(ranked.where(fts_table.c.rowid != exact_id), exact)
+
+    return ranked.subquery()
+
+
+def _search(query, key, fts, ilike_fields, search_query, cursor, per_page):
+    # `query` is a column projection that includes `key`
+    if fts_available() and match_expression(search_query):
+        ranked = _ranked_ids(fts, search_query, key)
+        query = query.add_columns(ranked.c.rank).join(ranked, ranked.c.id == key)
+
+        return keyset_page(query, [ranked.c.rank, key], cursor, per_page)
+
+    # Fallback: leading-wildcard ILIKE (full scan)
+    is_id = search_query.isdigit()
+    query = query.filter(
+        or_(
+            *[field.ilike(f"%{search_query}%") for field in ilike_fields],
+            key == int(search_query) if is_id else False
+        )
+    )
+
+    return keyset_page(query, [key], cursor, per_page)
+
+
+def search_students(search_query, cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    query = db.session.query(Student.student_id, Student.full_name, Student.branch, Student.cgpa)
+
+    return _search(query, Student.student_id, "student_fts",
+                   [Student.full_name, Student.branch], search_query, cursor, per_page)
+
+
+def search_companies(search_query, cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    query = db.session.query(Company.company_id, Company.company_name, Company.website,
+                             Company.approval_status, Company.is_blacklisted)
+
+    return _search(query, Company.company_id, "company_fts",
+                   [Company.company_name, Company.website], search_query, cursor, per_page)
+
+
+def search_drives(search_query, cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    return _search(all_drives_query(), Placement.drive_id, "drive_fts",
+                   [Placement.job_title, Placement.job_description], search_query, cursor, per_page)
@@ -0,0 +1,93 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregates
+from app import create_app, init_db
+from models import db, User, Student, Company, Placement, Applications, BranchStats
+
+
+# branch_stats.placed must stay right when one flush touches several Selected
+# applications of the same student (inserted together, or deleted by a purge).
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "portal.db"),
+        "FRAGMENT_CACHE": "none",
+        "DEADLINE_SCHEDULER": False,
+        "JOB_WORKER_THREAD": False,
+        "PASSWORD_HASH_WORKERS": 0,
+    })
+    with app.app_context():
+        init_db()
+        yield app
+
+
+def _student_with_drives(n):
+    user = User(email="student@test", password="x", role="Student")
+    db.session.add(user)
+    db.session.flush()
+    student = Student(user_id=user.id, full_name="Test Student", cgpa=8.0, branch="CSE")
+    company_user = User(email="company@test", password="x", role="Company")
+    db.session.add_all([student, company_user])
+    db.session.flush()
+    company = Company(user_id=company_user.id, company_name="Company", hr_contact="hr", website="w",
+                      approval_status="Approved")
+    db.session.add(company)
+    db.session.flush()
+    drives = [Placement(company_id=company.company_id, job_title=f"Job {i}", min_cgpa=6.0,
+                        deadline=datetime.now() + timedelta(days=30), job_description="d") for i in range(n)]
+    db.session.add_all(drives)
+    db.session.commit()
+    return student, drives
+
+
+def _placed(branch):
+    return db.session.get(BranchStats, branch).placed
+
+
+def test_selected_applications_in_one_flush(app):
+    student, drives = _student_with_drives(2)
+    db.session.add_all([Applications(student_id=student.student_id, drive_id=d.drive_id, status="Selected")
+                        for d in drives])
+    db.session.commit()
+
+    assert _placed("CSE") == 1
+    assert aggregates.check() == []
+
+
+def test_purge_student_with_selected_applications(app):
+    student, drives = _student_with_drives(2)
+    db.session.add_all([Applications(student_id=student.student_id, drive_id=d.drive_id, status="Selected")
+                        for d in drives])
+    db.session.commit()
+
+    db.session.delete(student)                             # cascades to both applications, like purge-deleted
+    db.session.commit()
+
+    assert _placed("CSE") == 0
+    assert aggregates.check() == []
+
+
+def test_status_changes_in_one_flush(app):
+    student, drives = _student_with_drives(2)
+    applications = [Applications(student_id=student.student_id, drive_id=d.drive_id, status="Selected")
+                    for d in drives]
+    db.session.add_all(applications)
+    db.session.commit()
+
+    for application in applications:
+        application.status = "Rejected"
+    db.session.commit()
+    assert _placed("CSE") == 0
+
+    applications[0].status = "Selected"
+    db.session.commit()
+    assert _placed("CSE") == 1
+    assert aggregates.check() == []
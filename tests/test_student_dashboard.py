@@ -0,0 +1,95 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_db
+from models import db, User, Student, Company, Placement, Applications
+
+
+# The student dashboard must run a fixed number of SQL statements, however many
+# drives and applications there are (no per-row queries in the view or template).
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "portal.db"),
+        "FRAGMENT_CACHE": "none",
+        "DEADLINE_SCHEDULER": False,
+        "JOB_WORKER_THREAD": False,
+        "PASSWORD_HASH_WORKERS": 0,
+        "RESUME_DIR": str(tmp_path / "resumes"),
+    })
+    with app.app_context():
+        init_db()
+    return app
+
+
+def _add_student(app):
+    with app.app_context():
+        user = User(email="student@test", password="x", role="Student")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Student(user_id=user.id, full_name="Test Student", cgpa=8.0, branch="CSE"))
+        db.session.commit()
+        return user.id, user.student_profile.student_id
+
+
+def _add_drives(app, student_id, n, start):
+    # n companies with one open drive each, the student applied to every other one
+    with app.app_context():
+        for i in range(start, start + n):
+            user = User(email=f"company{i}@test", password="x", role="Company")
+            db.session.add(user)
+            db.session.flush()
+            company = Company(user_id=user.id, company_name=f"Company {i}", hr_contact="hr", website="w",
+                              approval_status="Approved")
+            db.session.add(company)
+            db.session.flush()
+            drive = Placement(company_id=company.company_id, job_title=f"Job {i}", min_cgpa=6.0,
+                              deadline=datetime.now() + timedelta(days=30), job_description="d")
+            db.session.add(drive)
+            db.session.flush()
+            if i % 2 == 0:
+                db.session.add(Applications(student_id=student_id, drive_id=drive.drive_id))
+        db.session.commit()
+
+
+def _statements(app, client, path):
+    count = [0]
+
+    def before_cursor_execute(*args):
+        count[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return count[0]
+
+
+def test_statement_count_does_not_grow_with_drives(app):
+    user_id, student_id = _add_student(app)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["role"] = "Student"
+
+    _add_drives(app, student_id, 3, 0)
+    client.get("/dashboard/student")                       # identity and eligibility caches
+    small = _statements(app, client, "/dashboard/student")
+
+    _add_drives(app, student_id, 40, 3)
+    client.get("/dashboard/student")
+    large = _statements(app, client, "/dashboard/student")
+
+    assert small == large
@@ -0,0 +1,13 @@
+from app import create_app
+
+
+# Production entry point. The app is built once in the server's master process
+# and forked into the workers (preloading), so a worker starts serving right away:
+# no imports, no schema checks and no admin seeding per worker.
+#
+#   flask --app app init-db                                # once per deploy
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Any other WSGI server works too, e.g. `waitress-serve --threads 8 wsgi:app`.
+
+app = create_app()